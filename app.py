@@ -11,11 +11,14 @@ import re
 import unicodedata
 import uuid
 import json
+import time
 import datetime
+import hashlib
 import pyqrcode
 import io
 import base64
 from typing import Dict, Any
+import click
 from flask import (
 	Flask,
 	render_template,
@@ -32,7 +35,10 @@ from flask import (
 from werkzeug.utils import secure_filename
 from werkzeug.security import generate_password_hash, check_password_hash
 from jinja2 import Environment, FileSystemLoader, ChoiceLoader, select_autoescape
-from utils.theme_loader import load_theme_functions,copy_theme_static_files
+from utils.theme_loader import load_theme_functions,copy_theme_static_files,get_theme_version,get_theme_modified
+from utils.page_cache import PageCache, CachedPage
+from utils.shared_cache import SharedPageCache
+from utils.session_store import load_secret_key, create_session_interface, ServerSideSession
 from functools import wraps
 import pyotp
 from dotenv import load_dotenv
@@ -40,6 +46,20 @@ from data_store import (
 	get_pages,
 	get_draft_pages,
 	get_posts,
+	search_posts,
+	rebuild_search_index,
+	warm_search_index,
+	suggest,
+	get_related_posts,
+	rebuild_related_posts,
+	get_published_posts_page,
+	get_post,
+	get_category,
+	get_tag,
+	get_tag_facets,
+	get_tagged_posts_page,
+	get_post_listing,
+	rebuild_content_snapshot,
 	get_draft_posts,
 	get_categories,
 	get_tags,
@@ -51,6 +71,16 @@ from data_store import (
 	add_draft_post,
 	update_site_settings,
 	update_tag_counts,
+	explain_listing_queries,
+	migrate_indexes,
+	set_derived_fields,
+	backfill_derived_fields,
+	on_commit,
+	on_cache_invalidated,
+	sync_cache_versions,
+	get_cache_validators,
+	get_post_updated_at,
+	get_page_updated_at,
 	db_manager,
 )
 from PIL import Image
@@ -77,7 +107,7 @@ from sqlalchemy.exc import SQLAlchemyError
 #
 #  ***********************  Start Local Import ****************************
 #**************************
-from data_store import Page, Post, Category, Tag, SiteSetting
+from data_store import Page, Post, Category, Tag, SiteSetting, ServerSession
 
 #  ***********************  End Local Import ****************************
 #**************************
@@ -135,7 +165,34 @@ Configuration Sources:
 
 load_dotenv()
 app = Flask(__name__, static_folder="static")
-app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", secrets.token_hex(16))
+
+# One signing key for every worker and node: SECRET_KEY, else a key file
+# generated once and shared (point SECRET_KEY_FILE at shared storage)
+app.config["SECRET_KEY"] = os.getenv("SECRET_KEY") or load_secret_key(
+	os.getenv("SECRET_KEY_FILE", os.path.join(app.instance_path, "secret_key"))
+)
+
+# Session storage: "cookie" (signed cookie), "database" or "filesystem"
+app.config["SESSION_BACKEND"] = os.getenv("SESSION_BACKEND", "cookie").lower()
+app.config["SESSION_FILE_DIR"] = os.getenv(
+	"SESSION_FILE_DIR", os.path.join(app.instance_path, "sessions")
+)
+app.config["SESSION_SWEEP_INTERVAL"] = float(os.getenv("SESSION_SWEEP_INTERVAL", 3600))
+session_interface = create_session_interface(
+	app.config["SESSION_BACKEND"],
+	engine=db_manager.engine,
+	table=ServerSession.__table__,
+	directory=app.config["SESSION_FILE_DIR"],
+	sweep_interval=app.config["SESSION_SWEEP_INTERVAL"],
+)
+if session_interface is not None:
+	app.session_interface = session_interface
+
+# Share one database session per request, closed on app context teardown
+db_manager.init_app(app)
+
+# Build (or load) the search index now rather than on the first search
+warm_search_index()
 
 # Configure template loading from multiple directories with absolute paths
 base_dir = os.path.dirname(os.path.abspath(__file__))
@@ -192,6 +249,31 @@ def inject_globals():
 	return data
 
 
+@app.before_request
+def pin_database_reads():
+	"""
+	Sends this client's reads to the primary database shortly after it saved
+	something, so read replica lag never hides an admin's own changes.
+	
+	Only consulted when read replicas are configured and the client already
+	has a session cookie, so anonymous requests never touch the session.
+	"""
+	if not db_manager.replica_engines:
+		return
+	if app.config["SESSION_COOKIE_NAME"] not in request.cookies:
+		return
+	if session.get("db_pin_until", 0) > time.time():
+		db_manager.pin_reads_to_primary()
+
+
+@app.after_request
+def remember_database_write(response):
+	"""Records the read-after-write window in the session after a write"""
+	if db_manager.replica_engines and db_manager.wrote_in_request():
+		session["db_pin_until"] = time.time() + db_manager.read_after_write_seconds
+	return response
+
+
 
 
 
@@ -211,12 +293,39 @@ if not os.path.exists(os.path.join(UPLOAD_DIR, "thumbnails")):
 # Load theme functions
 theme_functions = load_theme_functions(THEME_NAME)
 copy_theme_static_files(THEME_NAME)
+THEME_VERSION = get_theme_version(THEME_NAME)
+THEME_MODIFIED = get_theme_modified(THEME_NAME)
 
-# app.secret_key = os.getenv('SECRET_KEY', 'dev_key_change_in_production')
-app.secret_key = secrets.token_hex(32)
 app.config["UPLOAD_FOLDER"] = UPLOAD_DIR
 app.config["MAX_CONTENT_LENGTH"] = 16 * 1024 * 1024
 
+# Seconds shared caches (CDN, reverse proxy) may serve public pages without revalidating
+app.config["PUBLIC_CACHE_MAX_AGE"] = int(os.getenv("PUBLIC_CACHE_MAX_AGE", 60))
+
+# Posts per page on category and tag archives
+app.config["ARCHIVE_POSTS_PER_PAGE"] = int(os.getenv("ARCHIVE_POSTS_PER_PAGE", 10))
+
+# Opt-in full-page cache for anonymous visitors of the public routes
+app.config["PAGE_CACHE_ENABLED"] = os.getenv("PAGE_CACHE_ENABLED", "").lower() in ("1", "true", "yes")
+app.config["PAGE_CACHE_MAX_BYTES"] = int(os.getenv("PAGE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+# "memory" keeps one cache per worker; "shared" maps one cache file for all workers on the host
+app.config["PAGE_CACHE_BACKEND"] = os.getenv("PAGE_CACHE_BACKEND", "memory").lower()
+app.config["PAGE_CACHE_PATH"] = os.getenv(
+	"PAGE_CACHE_PATH", os.path.join(app.instance_path, "page_cache.bin")
+)
+# Shared cache slots; a page larger than PAGE_CACHE_MAX_BYTES / slots is not cached
+app.config["PAGE_CACHE_SLOTS"] = int(os.getenv("PAGE_CACHE_SLOTS", 512))
+if not app.config["PAGE_CACHE_ENABLED"]:
+	page_cache = None
+elif app.config["PAGE_CACHE_BACKEND"] == "shared":
+	page_cache = SharedPageCache(
+		app.config["PAGE_CACHE_PATH"],
+		app.config["PAGE_CACHE_MAX_BYTES"],
+		app.config["PAGE_CACHE_SLOTS"],
+	)
+else:
+	page_cache = PageCache(app.config["PAGE_CACHE_MAX_BYTES"])
+
 #  ***********************  End Configuration  ****************************
 #*
 
@@ -249,6 +358,20 @@ def slugify(title: str) -> str:
     return slug
 
 
+def build_pagination(posts_page: Dict[str, Any]) -> Dict[str, Any]:
+	"""Template pagination context for a get_published_posts_page() result"""
+	page = posts_page["page"]
+	total_pages = posts_page["total_pages"]
+	return {
+		"current_page": page,
+		"total_pages": total_pages,
+		"pages": range(1, total_pages + 1),
+		"prev_page": page - 1 if page > 1 else None,
+		"next_page": page + 1 if posts_page["next_cursor"] else None,
+		"next_cursor": posts_page["next_cursor"],
+	}
+
+
 def create_image_thumbnails(image_path: str, filename: str) -> Dict[str, str]:
 
 	"""
@@ -312,6 +435,199 @@ def setup_required(f):
 	return decorated_function
 
 
+def is_admin_request() -> bool:
+	"""
+	Whether the current request comes from a logged-in admin.
+	
+	Looks for the session cookie first so anonymous requests never load the
+	session (which would add Vary: Cookie to their responses).
+	"""
+	if app.config["SESSION_COOKIE_NAME"] not in request.cookies:
+		return False
+	return bool(session.get("logged_in"))
+
+
+def cached_page(*tags):
+	"""
+	Decorator serving a public view from the page cache for anonymous visitors.
+
+	Responses are keyed by path and query string. Only 200 responses to GET
+	requests are stored, never ones marked Cache-Control: no-store, and
+	logged-in admins always bypass the cache.
+
+	Args:
+		*tags: Invalidation tags for the stored page; "{name}" placeholders are
+			filled from the view arguments (e.g. "page:{slug}")
+
+	Returns:
+		function: The decorator.
+	"""
+	def decorator(f):
+		@wraps(f)
+		def decorated_function(*args, **kwargs):
+			if page_cache is None or request.method != "GET" or is_admin_request():
+				return f(*args, **kwargs)
+
+			# Drops entries made stale by writes in other workers
+			sync_cache_versions()
+			key = request.full_path
+			cached = page_cache.get(key)
+			if cached is not None:
+				return app.response_class(
+					cached.body, status=cached.status, headers=cached.headers
+				)
+
+			generation = page_cache.generation
+			response = make_response(f(*args, **kwargs))
+			if (
+				response.status_code == 200
+				and not response.direct_passthrough
+				and not response.cache_control.no_store
+			):
+				page_cache.set(
+					key,
+					CachedPage(
+						response.get_data(),
+						response.status_code,
+						[("Content-Type", response.headers["Content-Type"])],
+					),
+					[tag.format(**kwargs) for tag in tags],
+					generation,
+				)
+			return response
+
+		return decorated_function
+
+	return decorator
+
+
+def conditional_get(*namespaces, updated_at=None):
+	"""
+	Decorator answering conditional GETs on public views with 304 Not Modified.
+
+	The ETag covers the path and query string, the versions of the cache
+	namespaces the page depends on, the theme and the resource's own
+	modification time. Last-Modified is the latest of those update times
+	and the theme files' modification time.
+	Both are known before the view runs, so a matching If-None-Match or
+	If-Modified-Since skips rendering and loading the content altogether.
+	Responses that did not touch the session are marked Cache-Control:
+	public so a CDN or reverse proxy can share them.
+
+	Args:
+		*namespaces: Cache namespaces the rendered page depends on
+		updated_at: Optional function of the view arguments returning the
+			resource's modification time, or None when it does not exist
+
+	Returns:
+		function: The decorator.
+	"""
+	def decorator(f):
+		@wraps(f)
+		def decorated_function(*args, **kwargs):
+			if request.method not in ("GET", "HEAD") or is_admin_request():
+				return f(*args, **kwargs)
+
+			validators = get_cache_validators(*namespaces)
+			if validators is None:
+				return f(*args, **kwargs)
+			versions, last_modified = validators
+			# A theme deploy changes the markup, so it must also move Last-Modified
+			# for clients revalidating with If-Modified-Since alone
+			last_modified = max(last_modified, THEME_MODIFIED)
+			resource_modified = None
+			if updated_at is not None:
+				resource_modified = updated_at(**kwargs)
+				if resource_modified is None:
+					# Missing resource: let the view answer (usually 404)
+					return f(*args, **kwargs)
+				last_modified = max(last_modified, resource_modified)
+			last_modified = last_modified.replace(
+				microsecond=0, tzinfo=datetime.timezone.utc
+			)
+			etag = hashlib.sha1(
+				f"{request.full_path}|{THEME_VERSION}|{versions}|{resource_modified}".encode()
+			).hexdigest()
+
+			if request.if_none_match:
+				not_modified = request.if_none_match.contains(etag)
+			else:
+				not_modified = (
+					request.if_modified_since is not None
+					and last_modified <= request.if_modified_since
+				)
+			if not_modified:
+				response = app.response_class(status=304)
+			else:
+				response = make_response(f(*args, **kwargs))
+				if response.status_code != 200 or response.cache_control.no_store:
+					return response
+			response.set_etag(etag)
+			response.last_modified = last_modified
+			if not session.accessed:
+				# Cookie-less response: shared caches may store and revalidate it
+				response.cache_control.public = True
+				response.cache_control.max_age = app.config["PUBLIC_CACHE_MAX_AGE"]
+			else:
+				response.cache_control.private = True
+				response.cache_control.no_cache = True
+			return response
+
+		return decorated_function
+
+	return decorator
+
+
+# Page cache tags affected by writes to each table. Post pages carry "posts"
+# because their sidebar counts and related posts depend on other posts.
+PAGE_CACHE_TAGS_BY_TABLE = {
+	"posts": {"posts"},
+	"categories": {"posts"},
+	"tags": {"posts"},
+	"sitemaps": {"sitemap"},
+}
+
+
+@on_commit
+def invalidate_page_cache(changes):
+	"""Drops the cached pages affected by a committed write"""
+	if page_cache is None:
+		return
+	if "site_settings" in changes:
+		# Settings (title, menu, theme, analytics) are rendered on every page
+		page_cache.clear()
+		return
+	tags = set()
+	for table, table_tags in PAGE_CACHE_TAGS_BY_TABLE.items():
+		if table in changes:
+			tags |= table_tags
+	if "pages" in changes:
+		tags |= {f"page:{slug}" for slug in changes["pages"].values() if slug}
+	if tags:
+		page_cache.invalidate(tags)
+
+
+# Writes made by other workers are only known per namespace, so they drop
+# every page of the affected kind
+PAGE_CACHE_TAGS_BY_NAMESPACE = {
+	"posts": {"posts"},
+	"taxonomy": {"posts"},
+	"pages": {"pages"},
+	"sitemap": {"sitemap"},
+}
+
+
+@on_cache_invalidated("settings", *PAGE_CACHE_TAGS_BY_NAMESPACE)
+def invalidate_page_cache_namespace(namespace):
+	"""Drops cached pages after another worker wrote to namespace"""
+	if page_cache is None:
+		return
+	if namespace == "settings":
+		page_cache.clear()
+	else:
+		page_cache.invalidate(PAGE_CACHE_TAGS_BY_NAMESPACE[namespace])
+
+
 def login_required(f):
 	"""
 	Decorator to require user login for a route.
@@ -357,7 +673,7 @@ def get_page_by_slug(slug: str):
 	Raises:
 		SQLAlchemyError: If database query fails
 	"""
-	db = db_manager.get_session()
+	db = db_manager.get_read_session()
 	try:
 		page = db.query(Page).filter(Page.slug == slug).first()
 		return page.to_dict() if page else None
@@ -394,15 +710,7 @@ def get_post_by_slug(slug: str):
 	Raises:
 		SQLAlchemyError: Database query errors (caught internally)
 	"""
-	db = db_manager.get_session()
-	try:
-		post = db.query(Post).filter(Post.slug == slug).first()
-		return post.to_dict() if post else None
-	except SQLAlchemyError as e:
-		print(f"Error getting post by slug: {str(e)}")
-		return None
-	finally:
-		db.close()
+	return get_post(slug)
 def delete_post_by_slug(slug: str) -> bool:
 	"""
 	Deletes a post from the database using its URL slug.
@@ -454,6 +762,7 @@ def update_page_by_slug(slug: str, page_data: dict) -> bool:
 			page.description = page_data.get("description", page.description)
 			page.status = page_data.get("status", page.status)
 			page.updated_at = datetime.datetime.utcnow()
+			set_derived_fields(page)
 			db.commit()
 			return True
 		return False
@@ -524,9 +833,10 @@ def update_post_by_slug(slug: str, post_data: dict) -> bool:
 						db.add(tag)
 					post.tags.append(tag)
 
-			if post_data.get("status") == "published" and not post.published_at:
+			if post.status == "published" and not post.published_at:
 				post.published_at = datetime.datetime.utcnow()
 
+			set_derived_fields(post)
 			db.commit()
 			return True
 		return False
@@ -648,7 +958,7 @@ def generate_and_store_sitemap():
 		pages_data = []
 
 		# Add published posts
-		posts = get_posts()
+		posts = get_posts(summary=True)
 		for slug, post in posts.items():
 			if post.get("status") == "published":
 				pages_data.append({
@@ -738,13 +1048,35 @@ def server_error(e):
 
 
 
+def get_csrf_token() -> str:
+	"""Returns the session's CSRF token, generating it on first use"""
+	if "csrf_token" not in session:
+		session["csrf_token"] = secrets.token_hex(16)
+	return session["csrf_token"]
+
+
+class LazyCsrfToken:
+	"""
+	Template value that only creates the CSRF token when it is rendered.
+
+	Public theme pages never print it, so rendering them leaves the session
+	untouched and anonymous responses carry no Set-Cookie or Vary: Cookie.
+	"""
+
+	def __str__(self):
+		return get_csrf_token()
+
+	def __html__(self):
+		return get_csrf_token()
+
+
 @app.context_processor
 def inject_csrf_token():
 	"""
 	Injects CSRF token into all templates automatically.
 	
 	Features:
-	- Automatic token generation
+	- Lazy token generation (only when a template renders it)
 	- Session-based storage
 	- Cryptographically secure tokens
 	- Consistent token across requests
@@ -752,7 +1084,7 @@ def inject_csrf_token():
 	Token Generation:
 	- Uses secrets.token_hex for secure random values
 	- 16 bytes (32 hex characters) length
-	- Generated only if not present
+	- Generated the first time a form or admin template prints it
 	
 	Template Usage:
 	- Available as csrf_token variable
@@ -760,16 +1092,14 @@ def inject_csrf_token():
 	- Available for JavaScript via meta tag
 	
 	Returns:
-		dict: Context containing CSRF token
+		dict: Context containing the lazy CSRF token
 		
 	Security:
 		- Crypto-secure random generation
 		- Session-based storage
 		- Automatic injection
 	"""	
-	if "csrf_token" not in session:
-		session["csrf_token"] = secrets.token_hex(16)
-	return {"csrf_token": session["csrf_token"]}
+	return {"csrf_token": LazyCsrfToken()}
 
 
 
@@ -871,6 +1201,16 @@ def setup():
 
 #  ***********************   Start Login Logout ****************************
 #**************************
+def regenerate_session():
+	"""
+	Moves the session to a new id whenever it gains privileges, so a session
+	id planted before login never becomes an authenticated one. Signed cookie
+	sessions (SESSION_BACKEND=cookie) carry no id and need nothing.
+	"""
+	if isinstance(session, ServerSideSession):
+		session.regenerate()
+
+
 @app.route("/login", methods=["GET", "POST"])
 @setup_required
 def login():
@@ -934,6 +1274,7 @@ def login():
 			if admin_setup.get("two_fa_enabled") and admin_setup.get("two_fa_secret"):
 				totp = pyotp.TOTP(admin_setup["two_fa_secret"])
 				if totp.verify(twofa_code):
+					regenerate_session()
 					session["logged_in"] = True
 					session.pop("pending_2fa", None)
 					session.pop("temp_username", None)
@@ -956,6 +1297,7 @@ def login():
 				if admin_setup.get("two_fa_enabled") and admin_setup.get(
 					"two_fa_secret"
 				):
+					regenerate_session()
 					session["pending_2fa"] = True
 					session["temp_username"] = username
 					return render_template("login.html", show_2fa=True)
@@ -963,6 +1305,7 @@ def login():
 					# No 2FA needed, clear any 2FA session flags
 					session.pop("pending_2fa", None)
 					session.pop("temp_username", None)
+					regenerate_session()
 					session["logged_in"] = True
 					flash("Login successful!", "success")
 					return redirect(url_for("admin"))
@@ -1057,20 +1400,8 @@ def admin():
 		page_copy["slug"] = slug
 		all_pages.append(page_copy)
 
-	# Get all posts (both published and draft)
-	all_posts = []
-	posts = get_posts()
-	draft_posts = get_draft_posts()
-
-	for slug, post in posts.items():
-		post_copy = post.copy()
-		post_copy["slug"] = slug
-		all_posts.append(post_copy)
-
-	for slug, post in draft_posts.items():
-		post_copy = post.copy()
-		post_copy["slug"] = slug
-		all_posts.append(post_copy)
+	# All posts (both published and draft), without loading their content
+	all_posts = get_post_listing()
 
 	return render_template("admin.html", pages=all_pages, posts=all_posts)
 
@@ -1246,7 +1577,7 @@ def api_check_slug():
 
 	taken = False
 	if obj_type == 'post':
-		taken = exists_in(get_posts()) or exists_in(get_draft_posts())
+		taken = exists_in(get_posts(summary=True)) or exists_in(get_draft_posts(summary=True))
 	else:
 		taken = exists_in(get_pages()) or exists_in(get_draft_pages())
 
@@ -1258,7 +1589,7 @@ def api_check_slug():
 		while True:
 			candidate = f"{base}-{suffix}"
 			if obj_type == 'post':
-				if not (candidate in get_posts() or candidate in get_draft_posts()):
+				if not (candidate in get_posts(summary=True) or candidate in get_draft_posts(summary=True)):
 					suggested = candidate
 					break
 			else:
@@ -1625,7 +1956,7 @@ def import_content():
 			root = tree.getroot()
 			# Get existing slugs
 			existing_page_slugs = set(get_pages().keys())
-			existing_post_slugs = set(get_posts().keys())
+			existing_post_slugs = set(get_posts(summary=True).keys())
 			skipped_pages = []
 			skipped_posts = []
 			imported_pages = 0
@@ -2158,13 +2489,15 @@ def enable_2fa():
 
 
 @app.route("/")
+@conditional_get("settings", "posts", "taxonomy")
+@cached_page("posts")
 def home():
 	"""
 	Home page view that displays published posts with pagination.
 	
 	Features:
 	- Displays most recent published posts
-	- Paginates posts (10 per page)
+	- Paginates posts (10 per page) in SQL, with keyset cursors for Next links
 	- Shows tag cloud and categories
 	- Redirects to setup if system is not configured
 	
@@ -2181,42 +2514,15 @@ def home():
 
 	try:
 		page = max(1, int(request.args.get("page", 1)))
+		cursor = request.args.get("cursor")
 		posts_per_page = 10
 
-		published_posts = []
-		posts = get_posts()
-		
-
-		if not isinstance(posts, dict):
-			posts = {}
-
-		for slug, post in posts.items():
-			if post.get("status") == "published":
-				post_copy = post.copy()
-				post_copy["slug"] = slug
-				published_posts.append(post_copy)
-
-		# Sort by created_at or updated_at
-		published_posts.sort(
-			key=lambda x: x.get("created_at", x.get("updated_at", "")), reverse=True
+		# Ordering, limiting and (for cursors) keyset paging happen in SQL
+		posts_page = get_published_posts_page(
+			cursor=cursor, page=page, limit=posts_per_page
 		)
-
-		total_posts = len(published_posts)
-		total_pages = max(1, (total_posts + posts_per_page - 1) // posts_per_page)
-
-		page = min(page, total_pages)
-
-		start = (page - 1) * posts_per_page
-		end = start + posts_per_page
-		current_posts = published_posts[start:end]
-
-		pagination = {
-			"current_page": page,
-			"total_pages": total_pages,
-			"pages": range(1, total_pages + 1),
-			"prev_page": page - 1 if page > 1 else None,
-			"next_page": page + 1 if page < total_pages else None,
-		}
+		current_posts = posts_page["posts"]
+		pagination = build_pagination(posts_page)
 
 		tags = get_tags()
 		if not isinstance(tags, dict):
@@ -2258,33 +2564,41 @@ def home():
 			),
 		}
 
-		return render_template(
-			"main/master.html",
-			page=default_page,
-			posts=[],
-			pagination={
-				"current_page": 1,
-				"total_pages": 1,
-				"pages": [1],
-				"prev_page": None,
-				"next_page": None,
-			},
-			categories={},
-			tags={},
-			max_tag_count=1,
-			error=str(e),
+		# A transient failure: never stored by the page cache or shared caches
+		response = make_response(
+			render_template(
+				"main/master.html",
+				page=default_page,
+				posts=[],
+				pagination={
+					"current_page": 1,
+					"total_pages": 1,
+					"pages": [1],
+					"prev_page": None,
+					"next_page": None,
+				},
+				categories={},
+				tags={},
+				max_tag_count=1,
+				error=str(e),
+			),
+			503,
 		)
+		response.cache_control.no_store = True
+		return response
 
 
 
 @app.route("/post/<slug>")
+@conditional_get("settings", "posts", "taxonomy", updated_at=get_post_updated_at)
+@cached_page("posts")
 def view_post(slug):
 	"""
 	Displays a single blog post and its related content.
 	
 	Features:
 	- Shows full post content
-	- Displays related posts based on tags
+	- Displays related posts (precomputed from shared tags and category)
 	- Shows categories and tags
 	- Handles both published and draft posts
 	- Limits related posts to 3 items
@@ -2312,20 +2626,8 @@ def view_post(slug):
 	categories = get_categories()
 	tags = get_tags()
 
-	# Get related posts
-	related_posts = []
-	post_tags = post.get("tags", [])
-	all_posts = get_posts()
-
-	for other_slug, other_post in all_posts.items():
-		if other_slug != slug and other_post.get("status") == "published":
-			other_tags = other_post.get("tags", [])
-			if set(post_tags) & set(other_tags):  # If there are common tags
-				other_post_copy = other_post.copy()
-				other_post_copy["slug"] = other_slug
-				related_posts.append(other_post_copy)
-				if len(related_posts) >= 3:
-					break
+	# Related posts are precomputed on every post write
+	related_posts = get_related_posts(post["id"], limit=3)
 
 	# Add slug to post for template
 	post["slug"] = slug
@@ -2340,28 +2642,29 @@ def view_post(slug):
 
 
 @app.route("/category/<category_slug>")
+@conditional_get("settings", "posts", "taxonomy")
+@cached_page("posts")
 def view_category(category_slug):
 	"""
-	Displays posts from a specific category.
+	Displays posts from a specific category, one page at a time.
 	
 	Features:
-	- Lists all posts in category
+	- Paginated listing of the category's posts, newest first
 	- Shows category metadata
 	- Filters by published status
-	- Updates post counts
 	- 404 handling for invalid categories
 	
 	URL Parameters:
 		category_slug (str): URL slug of the category
 	
+	Query Parameters:
+		page (int): Page number (default 1)
+		cursor (str): Keyset cursor from the previous page's Next link (optional)
+	
 	Template Context:
-		- category: Category metadata
-		- posts: List of posts in category
-		- Each post includes:
-			- Title, content, metadata
-			- Publication date
-			- Tags
-			- Author info
+		- category: Category metadata, count is the published post count
+		- posts: Posts on this page
+		- pagination: Same structure as the home page
 	
 	Returns:
 		str: Rendered category template
@@ -2369,85 +2672,130 @@ def view_category(category_slug):
 	
 	Notes:
 		- Only shows published posts
-		- Updates category post count
+		- Pages are fetched through the category index, see get_published_posts_page()
 	"""
 
+	category_data = get_category(category_slug)
+	if category_data is None:
+		abort(404)
 
-	categories = get_categories()
-	if category_slug in categories:
-		category_posts = []
-		all_posts = get_posts()
-
-		for slug, post in all_posts.items():
-			# Corrected line:
-			if (
-				(post.get("category") or {}).get("slug") == category_slug
-				and post.get("status") == "published"
-			):
-				post_copy = post.copy()
-				post_copy["slug"] = slug
-				category_posts.append(post_copy)
-
-
-		category_data = categories[category_slug]
-		category_data["count"] = len(category_posts)
+	posts_page = get_published_posts_page(
+		cursor=request.args.get("cursor"),
+		page=max(1, request.args.get("page", 1, type=int)),
+		limit=app.config["ARCHIVE_POSTS_PER_PAGE"],
+		category_id=category_data["id"],
+	)
+	category_data["count"] = posts_page["total"]
 
-		return render_template(
-			"category.html", category=category_data, posts=category_posts
-		)
-	else:
-		abort(404)
+	return render_template(
+		"category.html",
+		category=category_data,
+		posts=posts_page["posts"],
+		pagination=build_pagination(posts_page),
+	)
 
 
 @app.route("/tag/<tag_name>")
+@conditional_get("settings", "posts", "taxonomy")
+@cached_page("posts")
 def view_tag(tag_name):
 	"""
-	Displays all posts with a specific tag.
+	Displays posts with a specific tag, or a combination of tags, one page at a time.
 	
 	Features:
-	- Lists all posts with tag
+	- Paginated listing of tagged posts, newest first
+	- Tag combinations: /tag/python+flask (every tag), /tag/python,flask (any tag)
+	- Facets: other tags of the listed posts with how many posts carry them
 	- Shows tag statistics
 	- Filters by published status
-	- Orders by publication date
 	
 	URL Parameters:
-		tag_name (str): Name of the tag to filter by
+		tag_name (str): Name of the tag, or tag names joined by "+" or ","
+	
+	Query Parameters:
+		page (int): Page number (default 1)
+		cursor (str): Keyset cursor from the previous page's Next link (optional)
 	
 	Template Context:
 		tag: Tag information including:
-			- name: Tag name
-			- count: Number of posts
-		posts: List of tagged posts containing:
-			- Full post data
-			- Publication metadata
-			- Related tags
-			- Category info
+			- name: Tag name (tag names for combinations)
+			- names: List of the combined tag names
+			- mode: "all" or "any"
+			- path: tag_name as given in the URL
+			- count: Number of published posts
+		posts: Tagged posts on this page
+		facets: Other tags with name and count
+		pagination: Same structure as the home page
 	
 	Returns:
-		str: Rendered tag template with:
-			- Tag information
-			- Filtered post list
-			- Related metadata
+		str: Rendered tag template
 	
 	Notes:
 		- Only shows published posts
-		- Maintains tag counts
-		- Supports pagination if needed
-	"""
+		- Unknown tags render an empty listing
+		- A tag whose name contains "+" or "," is matched as a whole first
+		- Single tags are paged through the post_tags index (see
+		  get_published_posts_page()), combinations through the in-memory tag
+		  index (see get_tagged_posts_page())
+	"""
+
+	page = max(1, request.args.get("page", 1, type=int))
+	limit = app.config["ARCHIVE_POSTS_PER_PAGE"]
+
+	tag = get_tag(tag_name)
+	if tag is None and ("+" in tag_name or "," in tag_name):
+		mode = "all" if "+" in tag_name else "any"
+		names = [name.strip() for name in re.split(r"[+,]", tag_name) if name.strip()]
+		posts_page = get_tagged_posts_page(names, mode=mode, page=page, limit=limit)
+		separator = " + " if mode == "all" else " or "
+		return render_template(
+			"tag.html",
+			tag={
+				"name": separator.join(names),
+				"names": names,
+				"mode": mode,
+				"path": tag_name,
+				"count": posts_page["total"],
+			},
+			posts=posts_page["posts"],
+			facets=posts_page["facets"],
+			pagination=build_pagination(posts_page),
+		)
 
-	tagged_posts = []
-	all_posts = get_posts()
+	if tag is None:
+		return render_template(
+			"tag.html",
+			tag={
+				"name": tag_name,
+				"names": [tag_name],
+				"mode": "all",
+				"path": tag_name,
+				"count": 0,
+			},
+			posts=[],
+			facets=[],
+			pagination=None,
+		)
 
-	for slug, post in all_posts.items():
-		if tag_name in post.get("tags", []) and post.get("status") == "published":
-			post_copy = post.copy()
-			post_copy["slug"] = slug
-			tagged_posts.append(post_copy)
+	posts_page = get_published_posts_page(
+		cursor=request.args.get("cursor"),
+		page=page,
+		limit=limit,
+		tag_id=tag["id"],
+	)
 
 	return render_template(
 		"tag.html",
-		tag={"name": tag_name, "count": len(tagged_posts)},
-		posts=tagged_posts,
+		tag={
+			"name": tag["name"],
+			"names": [tag["name"]],
+			"mode": "all",
+			"path": tag_name,
+			"count": posts_page["total"],
+		},
+		posts=posts_page["posts"],
+		facets=get_tag_facets([tag["name"]]),
+		pagination=build_pagination(posts_page),
 	)
 
 
@@ -2458,43 +2806,73 @@ def search():
 	
 	Features:
 	- Searches in title, content, excerpt, and tags
-	- Case-insensitive search
+	- Ranked results with highlighted snippets
+	- Paginated (10 results per page)
 	- Only returns published posts
 	- Supports empty search query
 	
 	Query Parameters:
 		q (str): Search query string
+		page (int): Result page number (default: 1)
 		
 	Returns:
 		str: Rendered search results template with:
 			- Search query
-			- List of matching posts
-			- Each post includes title, excerpt, and metadata
+			- List of matching posts, each with a snippet
+			- Pagination information
 	"""
 
-	query = request.args.get("q", "")
+	query = request.args.get("q", "").strip()
+	page = request.args.get("page", 1, type=int)
 	search_results = []
+	pagination = None
 
 	if query:
-		all_posts = get_posts()
-		for slug, post in all_posts.items():
-			if post.get("status") == "published":
-				if (
-					query.lower() in post.get("title", "").lower()
-					or query.lower() in post.get("content", "").lower()
-					or query.lower() in post.get("excerpt", "").lower()
-					or query.lower() in ",".join(post.get("tags", [])).lower()
-				):
-					post_copy = post.copy()
-					post_copy["slug"] = slug
-					search_results.append(post_copy)
+		found = search_posts(query, page=page, per_page=10)
+		search_results = found["posts"]
+		page, total_pages = found["page"], found["total_pages"]
+		pagination = {
+			"total": found["total"],
+			"current_page": page,
+			"total_pages": total_pages,
+			"pages": range(1, total_pages + 1),
+			"prev_page": page - 1 if page > 1 else None,
+			"next_page": page + 1 if page < total_pages else None,
+		}
+
+	return render_template(
+		"search.html", query=query, results=search_results, pagination=pagination
+	)
 
-	return render_template("search.html", query=query, results=search_results)
 
 
 
 
 
+@app.route("/search/suggest")
+def search_suggest():
+	"""
+	Typeahead suggestions for the search box.
+	
+	Matches the start of any word in published post titles, tag names and
+	category names; tags and categories with more posts rank first.
+	
+	Query Parameters:
+		q (str): Partial search query
+		limit (int): Maximum suggestions (default: 8, at most 20)
+		
+	Returns:
+		JSON: {"query": q, "suggestions": [{"label", "url", "type"}, ...]}
+	"""
+	query = request.args.get("q", "").strip()[:100]
+	limit = min(max(request.args.get("limit", 8, type=int), 1), 20)
+	response = jsonify({"query": query, "suggestions": suggest(query, limit) if query else []})
+	response.cache_control.public = True
+	response.cache_control.max_age = app.config["PUBLIC_CACHE_MAX_AGE"]
+	return response
+
+
+
 
 #  *********************** End Page and Post Serve  ****************************
 #*
@@ -3009,6 +3387,8 @@ def delete_post_route(slug):
 	return redirect(url_for("admin"))
 
 @app.route("/<slug>")
+@conditional_get("settings", "pages", updated_at=get_page_updated_at)
+@cached_page("pages", "page:{slug}")
 def view_page(slug):
 	"""
 	Catch-all route that serves individual pages.
@@ -3232,6 +3612,8 @@ def uploaded_file(filename):
 # ************************** Start Stitemap ************************
 
 @app.route('/sitemap.xml')
+@conditional_get("sitemap")
+@cached_page("sitemap")
 def sitemap():
 	"""
 	Serves the pre-generated sitemap from the dedicated sitemaps table.
@@ -3258,6 +3640,130 @@ def sitemap():
 
 
 
+# ************************** Start CLI Commands ************************
+
+@app.cli.command("migrate-indexes")
+def migrate_indexes_command():
+	"""
+	Adds missing performance indexes to an existing database.
+	
+	Prints the EXPLAIN plan of the listing queries before and after the
+	migration so the planner's use of the new indexes can be verified.
+	
+	Usage:
+		flask --app app migrate-indexes
+	"""
+	before = explain_listing_queries()
+	created = migrate_indexes()
+	after = explain_listing_queries()
+
+	if created:
+		print("Created indexes:")
+		for name in created:
+			print(f"  {name}")
+	else:
+		print("All indexes already present.")
+
+	for label in after:
+		print(f"\n== {label} ==")
+		print("before:")
+		for line in before.get(label, []):
+			print(f"  {line}")
+		print("after:")
+		for line in after[label]:
+			print(f"  {line}")
+
+
+@app.cli.command("rebuild-search-index")
+def rebuild_search_index_command():
+	"""
+	Re-indexes every published post for full-text search.
+	
+	The index is kept in step by post writes; this is for databases edited
+	outside the app or restored from a backup.
+	
+	Usage:
+		flask --app app rebuild-search-index
+	"""
+	indexed = rebuild_search_index()
+	print(f"Indexed {indexed} posts.")
+
+
+@app.cli.command("rebuild-related-posts")
+def rebuild_related_posts_command():
+	"""
+	Recomputes the related posts of every published post.
+	
+	Writes keep them up to date; a periodic rebuild also refreshes the tag
+	rarity weights as the site grows.
+	
+	Usage:
+		flask --app app rebuild-related-posts
+	"""
+	count = rebuild_related_posts()
+	print(f"Related posts computed for {count} posts.")
+
+
+@app.cli.command("rebuild-content-snapshot")
+def rebuild_content_snapshot_command():
+	"""
+	Rewrites the shared content snapshot (CONTENT_SNAPSHOT) from the database.
+	
+	Writes keep the snapshot up to date; use this after changing the
+	database outside the application. Running workers pick up the new
+	generation on their next listing.
+	
+	Usage:
+		flask --app app rebuild-content-snapshot
+	"""
+	generation = rebuild_content_snapshot()
+	print(f"Content snapshot written (generation {generation}).")
+
+
+@app.cli.command("backfill-derived-fields")
+@click.option("--all", "refresh_all", is_flag=True, help="Recompute every post and page.")
+def backfill_derived_fields_command(refresh_all):
+	"""
+	Stores word count, reading time, plain-text excerpt and publish date on
+	posts and pages saved before these fields existed.
+	
+	Saving a post or page keeps them current; pass --all to recompute every
+	row, e.g. after changing WORDS_PER_MINUTE or PLAIN_EXCERPT_LENGTH.
+	
+	Usage:
+		flask --app app backfill-derived-fields [--all]
+	"""
+	updated = backfill_derived_fields(refresh_all=refresh_all)
+	for table, count in updated.items():
+		print(f"Updated {count} {table}.")
+
+
+@app.cli.command("sweep-sessions")
+def sweep_sessions_command():
+	"""
+	Deletes expired server-side sessions.
+	
+	Workers already sweep every SESSION_SWEEP_INTERVAL seconds; this is for
+	cron jobs on deployments with long-lived or idle workers.
+	
+	Usage:
+		flask --app app sweep-sessions
+	"""
+	if session_interface is None:
+		print("SESSION_BACKEND is 'cookie'; there are no server-side sessions.")
+		return
+	removed = session_interface.store.sweep()
+	print(f"Removed {removed} expired sessions.")
+
+# ************************** End CLI Commands ************************
+
+
+
+
+
+
+
+
 
 
 
@@ -4,26 +4,54 @@
 # Last Updated: September 13, 2025
 
 import os
+import re
+import html
 import json
+import math
+import time
+import heapq
+import base64
 import datetime
+import itertools
+import threading
 from datetime import timedelta
 from typing import Dict, Any, List, Optional
 from sqlalchemy import (
 	create_engine,
 	Column,
 	Integer,
+	Float,
 	String,
 	Text,
 	DateTime,
+	Date,
 	Boolean,
 	ForeignKey,
 	Table,
+	Index,
 	event,
+	func,
+	inspect,
+	select,
+	update,
+	insert,
+	delete,
+	or_,
+	text,
+	bindparam,
 )
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship, Session
+from sqlalchemy.orm import sessionmaker, relationship, selectinload, deferred, undefer, Session
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.pool import QueuePool, StaticPool
 from dotenv import load_dotenv
+from flask import g, has_app_context
+from markupsafe import Markup, escape
+from utils.search_index import SearchIndex, build_index
+from utils.suggest_index import SuggestIndex
+from utils.tag_index import TagIndex
+from utils.catalog import Catalog, CatalogRow, to_stamp
+from utils.snapshot import SnapshotFile, SnapshotRow
 
 # Load environment variables
 load_dotenv()
@@ -36,22 +64,328 @@ else:
 	# Use SQLite for development/testing
 	DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///cms.db")
 
-# Configure SQLAlchemy engine based on database type
-if DATABASE_URL.startswith("sqlite"):
-	engine = create_engine(
-		DATABASE_URL,
-		connect_args={"check_same_thread": False},  # Needed for SQLite
-		echo=False,
-	)
-else:
+# SQLite connection profiles, applied as PRAGMAs on every new connection.
+# "tuned" lets readers proceed while a writer commits (WAL), drops the fsync
+# on every commit to checkpoints only (synchronous=NORMAL) and waits on locks
+# instead of failing immediately with "database is locked".
+SQLITE_PROFILES = {
+	"default": {},
+	"tuned": {
+		"journal_mode": "WAL",
+		"synchronous": "NORMAL",
+		"cache_size": -int(os.getenv("SQLITE_CACHE_SIZE_KB", 65536)),  # negative = KiB
+		"mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", 268435456)),
+		"busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000)),
+		"temp_store": "MEMORY",
+	},
+}
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "tuned")
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+	"""Apply the configured SQLITE_PROFILE to a fresh DBAPI connection"""
+	cursor = dbapi_connection.cursor()
+	try:
+		for pragma, value in SQLITE_PROFILES.get(SQLITE_PROFILE, {}).items():
+			cursor.execute(f"PRAGMA {pragma}={value}")
+	finally:
+		cursor.close()
+
+
+def _create_engine(url: str):
+	"""Create an engine for url with pooling suited to the database type"""
+	if url.startswith("sqlite"):
+		if url in ("sqlite://", "sqlite:///:memory:"):
+			# A single shared connection, otherwise each thread sees its own empty database
+			sqlite_engine = create_engine(
+				url,
+				connect_args={"check_same_thread": False},
+				poolclass=StaticPool,
+				echo=False,
+			)
+		else:
+			# Pool connections across waitress/gunicorn threads
+			sqlite_engine = create_engine(
+				url,
+				connect_args={"check_same_thread": False},  # Needed for SQLite
+				poolclass=QueuePool,
+				pool_size=int(os.getenv("SQLITE_POOL_SIZE", 8)),
+				max_overflow=int(os.getenv("SQLITE_MAX_OVERFLOW", 16)),
+				pool_timeout=30,
+				echo=False,
+			)
+		event.listen(sqlite_engine, "connect", _apply_sqlite_pragmas)
+		return sqlite_engine
+
 	# MySQL configuration
-	engine = create_engine(
-		DATABASE_URL, echo=False, pool_size=5, max_overflow=10, pool_timeout=30
+	return create_engine(
+		url, echo=False, pool_size=5, max_overflow=10, pool_timeout=30
 	)
 
+
+# Configure SQLAlchemy engine based on database type
+engine = _create_engine(DATABASE_URL)
+
+class RequestSession(Session):
+	"""
+	Session shared by every data_store helper within one Flask app context.
+
+	Helpers still call close() when they finish; here that only clears a failed
+	transaction so the next helper can continue, and the connection stays checked
+	out until release() runs in teardown_appcontext.
+	"""
+
+	def close(self):
+		if not self.is_active:
+			self.rollback()
+
+	def release(self):
+		"""Really close the session and return its connection to the pool"""
+		super().close()
+
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+RequestSessionLocal = sessionmaker(
+	class_=RequestSession, autocommit=False, autoflush=False, bind=engine
+)
 Base = declarative_base()
 
+
+# Change tracking
+# Rows written through any session are collected per table on flush and
+# handed to the registered listeners once the transaction commits, so caches
+# are invalidated by every write path (including inline writes in app.py).
+_commit_listeners = []
+
+
+def on_commit(listener):
+	"""
+	Register a callable invoked after each commit that changed rows.
+
+	The listener receives a dict mapping each table written in that transaction
+	to {primary key: slug} for its changed rows (slug is None for models without
+	one). Usable as a decorator.
+	"""
+	_commit_listeners.append(listener)
+	return listener
+
+
+# Tables whose writes bump a cache namespace version (see CacheVersion)
+CACHE_NAMESPACE_TABLES = {
+	"site_settings": "settings",
+	"admin_setup": "admin",
+	"posts": "posts",
+	"pages": "pages",
+	"categories": "taxonomy",
+	"tags": "taxonomy",
+	"media": "media",
+	"media_library": "media",
+	"sitemaps": "sitemap",
+}
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+	changes = session.info.setdefault("changes", {})
+	namespaces = set()
+	for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+		table = getattr(obj, "__tablename__", None)
+		if table:
+			changes.setdefault(table, {})[getattr(obj, "id", None)] = getattr(
+				obj, "slug", None
+			)
+			if table in CACHE_NAMESPACE_TABLES:
+				namespaces.add(CACHE_NAMESPACE_TABLES[table])
+	if namespaces:
+		# Same connection and transaction as the write itself
+		bumped = _bump_cache_versions(session.connection(), namespaces)
+		# namespace -> [version before this transaction's first bump, latest version]
+		bumps = session.info.setdefault("cache_bumps", {})
+		for namespace, version in bumped.items():
+			bumps.setdefault(namespace, [version - 1, version])[1] = version
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_untagged_posts(session, flush_context, instances):
+	"""
+	Deleting a tag also deletes its post_tags rows, changing the tags of the
+	posts that carried it; record those posts as changed while the rows exist
+	"""
+	tag_ids = [obj.id for obj in session.deleted if isinstance(obj, Tag) and obj.id is not None]
+	if not tag_ids:
+		return
+	rows = session.connection().execute(
+		select(Post.id, Post.slug)
+		.join(post_tags, post_tags.c.post_id == Post.id)
+		.where(post_tags.c.tag_id.in_(tag_ids))
+	)
+	posts = session.info.setdefault("changes", {}).setdefault("posts", {})
+	for post_id, slug in rows:
+		posts[post_id] = slug
+
+
+def _bump_cache_versions(connection, namespaces) -> Dict[str, int]:
+	"""
+	Increment the version of each namespace (rows are seeded at startup) and
+	return the new versions, read back in the same transaction
+	"""
+	namespaces = sorted(namespaces)
+	connection.execute(
+		update(CacheVersion)
+		.where(CacheVersion.namespace.in_(namespaces))
+		.values(
+			version=CacheVersion.version + 1,
+			updated_at=datetime.datetime.utcnow(),
+		)
+	)
+	rows = connection.execute(
+		select(CacheVersion.namespace, CacheVersion.version).where(
+			CacheVersion.namespace.in_(namespaces)
+		)
+	)
+	return {namespace: version for namespace, version in rows}
+
+
+# Cross-worker invalidation bus
+# Writes in any worker bump their namespaces in cache_versions (above). Each
+# process reads all versions in one query, at most once per app context, and
+# calls the listeners of every namespace bumped since it last looked. The
+# process that made the write is told right away through on_commit instead,
+# and its own bumps are counted as seen.
+CACHE_VERSION_CHECK_INTERVAL = float(os.getenv("CACHE_VERSION_CHECK_INTERVAL", 0))
+
+_invalidation_listeners: Dict[str, List[Any]] = {}
+# Last versions seen by this process, and when they were read
+_seen_versions: Dict[str, Any] = {"versions": {}, "updated_at": {}, "checked_at": 0.0}
+# Guards replacing _seen_versions["versions"] (syncs and own-bump credits)
+_seen_versions_lock = threading.Lock()
+
+
+def on_cache_invalidated(*namespaces):
+	"""
+	Register a callable invoked with the namespace name when another process
+	bumps one of the given namespaces. Used as a decorator.
+
+	Usage:
+		@on_cache_invalidated("posts", "taxonomy")
+		def drop_listing_cache(namespace):
+			listing_cache.clear()
+	"""
+	def decorator(listener):
+		for namespace in namespaces:
+			_invalidation_listeners.setdefault(namespace, []).append(listener)
+		return listener
+
+	return decorator
+
+
+def sync_cache_versions() -> Dict[str, int]:
+	"""
+	Read the current cache namespace versions and fire invalidation listeners
+	for the namespaces that changed since this process last looked.
+
+	Runs the query at most once per app context, and no more often than
+	CACHE_VERSION_CHECK_INTERVAL seconds per process when that is set.
+
+	Returns:
+		Dict[str, int]: Namespace mapped to its current version (empty if the
+			versions cannot be read)
+	"""
+	if has_app_context() and "_cache_versions" in g:
+		return g._cache_versions
+
+	now = time.monotonic()
+	versions = _seen_versions["versions"]
+	if not versions or now - _seen_versions["checked_at"] >= CACHE_VERSION_CHECK_INTERVAL:
+		db = db_manager.get_read_session()
+		try:
+			rows = db.query(
+				CacheVersion.namespace, CacheVersion.version, CacheVersion.updated_at
+			).all()
+		except SQLAlchemyError as e:
+			print(f"Error reading cache versions: {str(e)}")
+			return {}
+		finally:
+			db.close()
+		versions = {namespace: version for namespace, version, _ in rows}
+		updated_at = {namespace: updated for namespace, _, updated in rows}
+
+		with _seen_versions_lock:
+			previous = _seen_versions["versions"]
+			_seen_versions.update(versions=versions, updated_at=updated_at, checked_at=now)
+		for namespace, version in versions.items():
+			if namespace in previous and previous[namespace] != version:
+				for listener in _invalidation_listeners.get(namespace, ()):
+					try:
+						listener(namespace)
+					except Exception as e:
+						print(f"Error in invalidation listener: {str(e)}")
+
+	if has_app_context():
+		g._cache_versions = versions
+	return versions
+
+
+def _credit_own_bumps(bumps):
+	"""
+	Count this process's committed bumps as seen. Its on_commit listeners
+	already handled the write, so the next sync only fires invalidation
+	listeners if another process bumped the namespace as well.
+
+	A namespace is credited only if the version seen is exactly the one this
+	transaction started from; otherwise (another process bumped it first, or
+	a sync already read the new version) the credit is dropped, at worst
+	costing one redundant invalidation but never hiding another's bump.
+	"""
+	if not bumps:
+		return
+	with _seen_versions_lock:
+		seen = _seen_versions["versions"]
+		if not seen:
+			return
+		credited = dict(seen)
+		for namespace, (base, latest) in bumps.items():
+			if credited.get(namespace) == base:
+				credited[namespace] = max(base, latest)
+		_seen_versions["versions"] = credited
+
+
+def get_cache_validators(*namespaces):
+	"""
+	Versions and last-modified time of the given namespaces, for HTTP validators.
+
+	Returns:
+		Tuple[Tuple[int, ...], datetime]: The namespaces' versions in argument
+			order and the latest of their update times, or None if unavailable
+	"""
+	versions = sync_cache_versions()
+	if not versions:
+		return None
+	updated_at = _seen_versions["updated_at"]
+	times = [updated_at.get(namespace) for namespace in namespaces]
+	times = [moment for moment in times if moment is not None]
+	last_modified = max(times) if times else datetime.datetime(1970, 1, 1)
+	return tuple(versions.get(namespace, 0) for namespace in namespaces), last_modified
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_changes(session):
+	_credit_own_bumps(session.info.pop("cache_bumps", None))
+	changes = session.info.pop("changes", None)
+	if not changes:
+		return
+	for listener in list(_commit_listeners):
+		try:
+			listener(changes)
+		except Exception as e:
+			print(f"Error in commit listener: {str(e)}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+	session.info.pop("changes", None)
+	session.info.pop("cache_bumps", None)
+
 # Association table for post-tag many-to-many relationship
 """
 Association table managing the many-to-many relationship between posts and tags.
@@ -93,6 +427,8 @@ post_tags = Table(
 	Base.metadata,
 	Column("post_id", Integer, ForeignKey("posts.id"), primary_key=True),
 	Column("tag_id", Integer, ForeignKey("tags.id"), primary_key=True),
+	# The composite primary key starts with post_id; tag archives look up by tag_id
+	Index("ix_post_tags_tag_id_post_id", "tag_id", "post_id"),
 )
 
 
@@ -158,6 +494,7 @@ class Media(Base):
 		- Image dimension tracking
 	"""    
 	__tablename__ = "media"
+	__table_args__ = (Index("ix_media_created_at", "created_at"),)
 
 	id = Column(Integer, primary_key=True)
 	filename = Column(String(255), nullable=False)
@@ -257,6 +594,13 @@ class Page(Base):
 			- 'draft': Work in progress
 		created_at (datetime): Creation timestamp
 		updated_at (datetime): Last modification time
+		word_count (int): Words of the plain-text content
+		reading_time (int): Estimated minutes to read
+		plain_excerpt (str): Plain-text summary of the description or content
+		publish_date (date): Creation date
+		
+		The last four are derived from the others on every write (see
+		set_derived_fields) so themes never recompute them while rendering.
 		
 	Common Pages:
 		- Homepage
@@ -294,6 +638,11 @@ class Page(Base):
 	updated_at = Column(
 		DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow
 	)
+	# Derived at write time by set_derived_fields()
+	word_count = Column(Integer)
+	reading_time = Column(Integer)
+	plain_excerpt = Column(Text)
+	publish_date = Column(Date)
 
 	def to_dict(self):
 		return {
@@ -305,6 +654,12 @@ class Page(Base):
 			"status": self.status,
 			"created_at": self.created_at.isoformat() if self.created_at else None,
 			"updated_at": self.updated_at.isoformat() if self.updated_at else None,
+			"word_count": self.word_count,
+			"reading_time": self.reading_time,
+			"plain_excerpt": self.plain_excerpt,
+			"publish_date": (
+				self.publish_date.isoformat() if self.publish_date else None
+			),
 		}
 
 
@@ -327,7 +682,8 @@ class Post(Base):
 		id (int): Primary key and unique identifier
 		slug (str): URL-friendly unique identifier
 		title (str): Post title, required
-		content (str): Full post content
+		content (str): Full post content, deferred: loaded on first access or
+			with undefer(Post.content), never by listing queries
 		excerpt (str): Brief summary
 		status (str): Publication status
 			- 'published': Live and visible
@@ -336,6 +692,14 @@ class Post(Base):
 		created_at (datetime): Creation timestamp
 		updated_at (datetime): Last modification time
 		published_at (datetime): When post went live
+		word_count (int): Words of the plain-text content
+		reading_time (int): Estimated minutes to read
+		plain_excerpt (str): Plain-text summary of the excerpt or content
+		publish_date (date): Publication date, or creation date for drafts
+		
+		The last four are derived from the others on every write (see
+		set_derived_fields), so listings and themes get them without loading
+		the deferred content.
 		
 	Relationships:
 		category: Parent category (many-to-one)
@@ -365,11 +729,22 @@ class Post(Base):
 	"""
 
 	__tablename__ = "posts"
+	__table_args__ = (
+		# Published listings filter on status and order by publish/creation time
+		Index("ix_posts_status_published_at", "status", "published_at"),
+		Index("ix_posts_status_created_at", "status", "created_at"),
+		Index(
+			"ix_posts_category_status_published_at",
+			"category_id",
+			"status",
+			"published_at",
+		),
+	)
 
 	id = Column(Integer, primary_key=True, index=True)
 	slug = Column(String(255), unique=True, index=True, nullable=False)
 	title = Column(String(255), nullable=False)
-	content = Column(Text)
+	content = deferred(Column(Text))
 	excerpt = Column(Text)
 	status = Column(String(50), default="published")  # published, draft
 	category_id = Column(Integer, ForeignKey("categories.id"))
@@ -378,27 +753,52 @@ class Post(Base):
 		DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow
 	)
 	published_at = Column(DateTime)
+	# Derived at write time by set_derived_fields()
+	word_count = Column(Integer)
+	reading_time = Column(Integer)
+	plain_excerpt = Column(Text)
+	publish_date = Column(Date)
 
 	# Relationships
 	category = relationship("Category", back_populates="posts")
 	tags = relationship("Tag", secondary=post_tags, back_populates="posts")
 
-	def to_dict(self):
+	def to_dict(self, category_counts: Optional[Dict[int, int]] = None):
+		post = self.to_summary(category_counts)
+		post["content"] = self.content
+		return post
+
+	def to_summary(self, category_counts: Optional[Dict[int, int]] = None):
+		# to_dict() without content, for listings; never loads the deferred body
+		category = None
+		if self.category:
+			category = self.category.to_dict(
+				post_count=(
+					category_counts.get(self.category_id, 0)
+					if category_counts is not None
+					else None
+				)
+			)
 		return {
 			"id": self.id,
 			"slug": self.slug,
 			"title": self.title,
-			"content": self.content,
 			"excerpt": self.excerpt,
 			"status": self.status,
 			"category_id": self.category_id,
-			"category": self.category.to_dict() if self.category else None,
+			"category": category,
 			"tags": [tag.name for tag in self.tags],
 			"created_at": self.created_at.isoformat() if self.created_at else None,
 			"updated_at": self.updated_at.isoformat() if self.updated_at else None,
 			"published_at": (
 				self.published_at.isoformat() if self.published_at else None
 			),
+			"word_count": self.word_count,
+			"reading_time": self.reading_time,
+			"plain_excerpt": self.plain_excerpt,
+			"publish_date": (
+				self.publish_date.isoformat() if self.publish_date else None
+			),
 		}
 
 
@@ -458,14 +858,15 @@ class Category(Base):
 	# Relationships
 	posts = relationship("Post", back_populates="category")
 
-	def to_dict(self):
+	def to_dict(self, post_count: Optional[int] = None):
+		# Pass post_count from a grouped count query to avoid loading self.posts
 		return {
 			"id": self.id,
 			"name": self.name,
 			"slug": self.slug,
 			"description": self.description,
 			"created_at": self.created_at.isoformat() if self.created_at else None,
-			"post_count": len(self.posts),
+			"post_count": len(self.posts) if post_count is None else post_count,
 		}
 
 
@@ -520,12 +921,15 @@ class Tag(Base):
 	# Relationships
 	posts = relationship("Post", secondary=post_tags, back_populates="tags")
 
-	def to_dict(self):
+	def to_dict(self, count: Optional[int] = None):
+		# Pass count from a grouped count query to avoid loading self.posts
+		if count is None:
+			count = len([post for post in self.posts if post.status == "published"])
 		return {
 			"id": self.id,
 			"name": self.name,
 			"created_at": self.created_at.isoformat() if self.created_at else None,
-			"count": len([post for post in self.posts if post.status == "published"]),
+			"count": count,
 		}
 
 
@@ -533,6 +937,70 @@ class Tag(Base):
 
 
 
+class RelatedPost(Base):
+	"""
+	Precomputed nearest neighbours of each published post (see
+	rebuild_related_posts).
+
+	Attributes:
+		post_id (int): Post the neighbours belong to
+		rank (int): 0-based position, best first
+		related_post_id (int): Neighbouring post
+		score (float): Similarity (weighted tag overlap plus category affinity)
+	"""
+	__tablename__ = "related_posts"
+	__table_args__ = (
+		# Finds the posts listing a changed post, so only those are recomputed
+		Index("ix_related_posts_related_post_id", "related_post_id"),
+	)
+
+	post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
+	rank = Column(Integer, primary_key=True)
+	related_post_id = Column(
+		Integer, ForeignKey("posts.id", ondelete="CASCADE"), nullable=False
+	)
+	score = Column(Float, nullable=False)
+
+
+class CacheVersion(Base):
+	"""
+	Monotonically increasing version per cache namespace.
+
+	A namespace's row is bumped inside the same transaction as any write to
+	the tables it covers (see CACHE_NAMESPACE_TABLES), so a process holding
+	cached data can tell whether it is stale by reading one integer.
+
+	Attributes:
+		namespace (str): Cache namespace name, primary key
+		version (int): Bumped on every write to the namespace's tables
+		updated_at (datetime): Time of the last bump
+	"""
+	__tablename__ = "cache_versions"
+
+	namespace = Column(String(50), primary_key=True)
+	version = Column(Integer, nullable=False, default=0)
+	updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+
+class ServerSession(Base):
+	"""
+	Server-side session data for SESSION_BACKEND=database.
+
+	Read and written by utils.session_store.DatabaseSessionStore; the session
+	cookie only holds the id.
+
+	Attributes:
+		session_id (str): Random session id, primary key
+		data (str): Serialized session contents
+		expires_at (datetime): Time after which the session is ignored and swept
+	"""
+	__tablename__ = "server_sessions"
+
+	session_id = Column(String(64), primary_key=True)
+	data = Column(Text, nullable=False)
+	expires_at = Column(DateTime, nullable=False, index=True)
+
+
 class SiteSetting(Base):
 	__tablename__ = "site_settings"
 
@@ -680,6 +1148,45 @@ class MediaLibrary(Base):
 
 
 
+# Derived fields
+# Word count, reading time, a plain-text excerpt and the publish date are
+# stored on posts and pages when they are written, so listings and themes read
+# them instead of stripping and counting the content on every render.
+WORDS_PER_MINUTE = 200
+PLAIN_EXCERPT_LENGTH = 150
+_HTML_TAG_RE = re.compile(r"<[^>]+>")
+
+
+def _plain_text(markup: Optional[str]) -> str:
+	"""Strip tags and entities from post HTML and collapse whitespace"""
+	if not markup:
+		return ""
+	return " ".join(html.unescape(_HTML_TAG_RE.sub(" ", markup)).split())
+
+
+def _plain_excerpt(text: str, length: int = PLAIN_EXCERPT_LENGTH) -> str:
+	"""Cut plain text at a word boundary, adding an ellipsis when shortened"""
+	if len(text) <= length:
+		return text
+	return text[:length].rsplit(" ", 1)[0] + "..."
+
+
+def set_derived_fields(item) -> None:
+	"""
+	Recompute the stored derived fields of a Post or Page from its content.
+
+	Called by every write path before committing. Reads the content, so the
+	deferred Post.content is loaded if it was not already.
+	"""
+	text = _plain_text(item.content)
+	item.word_count = len(text.split())
+	item.reading_time = max(1, round(item.word_count / WORDS_PER_MINUTE))
+	summary = item.excerpt if isinstance(item, Post) else item.description
+	item.plain_excerpt = _plain_excerpt(_plain_text(summary) or text)
+	published = getattr(item, "published_at", None) or item.created_at
+	item.publish_date = (published or datetime.datetime.utcnow()).date()
+
+
 # Database operations class
 class DatabaseManager:
 	"""
@@ -696,6 +1203,7 @@ class DatabaseManager:
 	Features:
 		- Automatic table creation
 		- Session pooling
+		- Read replica routing with read-after-write pinning
 		- Transaction management
 		- Error handling
 		- Connection management
@@ -703,6 +1211,9 @@ class DatabaseManager:
 	Usage:
 		manager = DatabaseManager()
 		manager.create_tables()
+		
+		# Route get_* helpers to replicas (or set DATABASE_REPLICA_URLS)
+		manager = DatabaseManager(read_replica_urls=["mysql://replica1/cms_db"])
 		manager.initialize_default_data()
 		
 	Security:
@@ -712,27 +1223,196 @@ class DatabaseManager:
 		- Error logging
 	"""
 
-	def __init__(self):
+	def __init__(self, read_replica_urls=None, read_after_write_seconds=None):
 		self.engine = engine
 		self.SessionLocal = SessionLocal
+		self.RequestSessionLocal = RequestSessionLocal
+
+		# Read replicas: get_read_session() spreads read-only helpers across these
+		if read_replica_urls is None:
+			read_replica_urls = [
+				url.strip()
+				for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",")
+				if url.strip()
+			]
+		elif isinstance(read_replica_urls, str):
+			read_replica_urls = [read_replica_urls]
+		self.replica_engines = [_create_engine(url) for url in read_replica_urls]
+		self._replica_cycle = itertools.cycle(self.replica_engines)
+
+		# After a write, reads go to the primary for this long so replica lag
+		# never hides what was just saved
+		if read_after_write_seconds is None:
+			read_after_write_seconds = float(os.getenv("READ_AFTER_WRITE_PIN_SECONDS", 5))
+		self.read_after_write_seconds = read_after_write_seconds
+		self._primary_pinned_until = 0.0
+		on_commit(self._pin_after_write)
+
+		# Setup never reverts once complete, so only a positive answer is cached.
+		# Admin credentials are cached with the "admin" cache version they were
+		# read at, as one (version, dict) tuple.
+		self._setup_complete = False
+		self._admin_cache = None
 
 		# Create tables
 		Base.metadata.create_all(self.engine)
+		self.add_missing_columns()
+		self.backfill_published_at()
+
+	def add_missing_columns(self) -> List[str]:
+		"""
+		Add nullable columns declared on the models that an existing table lacks.
+
+		create_all() never alters existing tables, and every query selects all
+		mapped columns, so new columns are added in place before first use.
+		Columns that cannot be added this way (not nullable, primary keys) are
+		left to a manual migration.
+
+		Returns:
+			List[str]: "table.column" of each column added
+		"""
+		added = []
+		try:
+			inspector = inspect(self.engine)
+			for table in Base.metadata.sorted_tables:
+				if not inspector.has_table(table.name):
+					continue
+				existing = {column["name"] for column in inspector.get_columns(table.name)}
+				for column in table.columns:
+					if column.name in existing or column.primary_key or not column.nullable:
+						continue
+					preparer = self.engine.dialect.identifier_preparer
+					column_type = column.type.compile(dialect=self.engine.dialect)
+					with self.engine.begin() as conn:
+						conn.execute(
+							text(
+								f"ALTER TABLE {preparer.quote(table.name)} "
+								f"ADD COLUMN {preparer.quote(column.name)} {column_type}"
+							)
+						)
+					added.append(f"{table.name}.{column.name}")
+		except SQLAlchemyError as e:
+			# Another worker starting at the same time may have added it first
+			print(f"Error adding missing columns: {str(e)}")
+		return added
+
+	def backfill_published_at(self) -> int:
+		"""
+		Set published_at from created_at on published posts that lack it.
+
+		Published listings sort and page on published_at alone, so a published
+		post without one would never be listed.
+
+		Returns:
+			int: Number of posts updated
+		"""
+		try:
+			with self.engine.begin() as conn:
+				result = conn.execute(
+					update(Post)
+					.where(Post.status == "published", Post.published_at.is_(None))
+					.values(published_at=Post.created_at)
+				)
+			return result.rowcount
+		except SQLAlchemyError as e:
+			print(f"Error backfilling published_at: {str(e)}")
+			return 0
 
 	def create_tables(self):
 		"""Create all tables"""
 		Base.metadata.create_all(bind=self.engine)
+		self.seed_cache_versions()
+
+	def seed_cache_versions(self):
+		"""Insert a version row for every cache namespace that lacks one"""
+		db = self.SessionLocal()
+		try:
+			existing = {row[0] for row in db.query(CacheVersion.namespace).all()}
+			for namespace in sorted(set(CACHE_NAMESPACE_TABLES.values()) - existing):
+				db.add(CacheVersion(namespace=namespace, version=0))
+			db.commit()
+		except SQLAlchemyError as e:
+			# Another worker seeding concurrently is fine
+			db.rollback()
+			print(f"Error seeding cache versions: {str(e)}")
+		finally:
+			db.close()
+
+	def init_app(self, app):
+		"""Release the request-scoped session when each app context ends"""
+		app.teardown_appcontext(self.remove_request_session)
 
 	def get_session(self) -> Session:
-		"""Get database session"""
+		"""
+		Get database session.
+
+		Inside a Flask app context every caller gets the same RequestSession, so a
+		request checks out one connection no matter how many helpers it calls.
+		Outside an app context (startup, scripts) a fresh session is returned.
+		"""
+		if has_app_context():
+			session = g.get("_db_session")
+			if session is None:
+				session = g._db_session = self.RequestSessionLocal()
+			return session
 		return self.SessionLocal()
 
+	def get_read_session(self) -> Session:
+		"""
+		Get a session for read-only queries.
+
+		Returns a session on one of the read replicas (round-robin), shared for the
+		current app context like get_session(). Falls back to the primary session
+		when no replicas are configured or reads are pinned after a write.
+		"""
+		if not self.replica_engines or self.reads_pinned_to_primary():
+			return self.get_session()
+		if has_app_context():
+			session = g.get("_db_read_session")
+			if session is None:
+				session = g._db_read_session = self.RequestSessionLocal(
+					bind=next(self._replica_cycle)
+				)
+			return session
+		return self.SessionLocal(bind=next(self._replica_cycle))
+
+	def reads_pinned_to_primary(self) -> bool:
+		"""Whether reads must currently go to the primary"""
+		if time.monotonic() < self._primary_pinned_until:
+			return True
+		return has_app_context() and g.get("_db_pin_primary", False)
+
+	def pin_reads_to_primary(self):
+		"""Send every read of the current app context to the primary"""
+		g._db_pin_primary = True
+
+	def wrote_in_request(self) -> bool:
+		"""Whether the current app context committed a write"""
+		return has_app_context() and g.get("_db_wrote", False)
+
+	def _pin_after_write(self, changes):
+		self._primary_pinned_until = time.monotonic() + self.read_after_write_seconds
+		if has_app_context():
+			g._db_wrote = True
+
+	def remove_request_session(self, exception=None):
+		"""teardown_appcontext handler closing the request-scoped sessions"""
+		for key in ("_db_session", "_db_read_session"):
+			session = g.pop(key, None)
+			if session is not None:
+				session.release()
+
 	def is_setup_complete(self) -> bool:
-		"""Check if initial setup is complete"""
+		"""Check if initial setup is complete (memoized once it is)"""
+		if self._setup_complete:
+			return True
 		db = self.get_session()
 		try:
 			admin_setup = db.query(AdminSetup).first()
-			return admin_setup is not None and admin_setup.is_configured
+			self._setup_complete = admin_setup is not None and bool(
+				admin_setup.is_configured
+			)
+			return self._setup_complete
 		except SQLAlchemyError as e:
 			print(f"Error checking setup status: {str(e)}")
 			return False
@@ -764,6 +1444,8 @@ class DatabaseManager:
 
 			db.add(admin_setup)
 			db.commit()
+			self._setup_complete = True
+			self._admin_cache = None
 			return True
 		except SQLAlchemyError as e:
 			db.rollback()
@@ -773,12 +1455,23 @@ class DatabaseManager:
 			db.close()
 
 	def get_admin_setup(self) -> Optional[Dict[str, Any]]:
-		"""Get admin setup information"""
-		db = self.get_session()
+		"""
+		Get admin setup information.
+
+		Memoized in process and revalidated against the "admin" cache version
+		on the primary, so credential or 2FA changes made by another worker are
+		picked up on the next call.
+		"""
+		db = None
 		try:
+			db = self.get_session()
+			version = get_cache_version("admin", db)
+			cached = self._admin_cache
+			if version is not None and cached and cached[0] == version:
+				return dict(cached[1])
 			admin_setup = db.query(AdminSetup).first()
 			if admin_setup and admin_setup.is_configured:
-				return {
+				result = {
 					"username": admin_setup.username,
 					"password": admin_setup.password,
 					"email": admin_setup.email,
@@ -788,12 +1481,16 @@ class DatabaseManager:
 					),
 					"is_configured": True,
 				}
+				if version is not None:
+					self._admin_cache = (version, result)
+				return dict(result)
 			return None
 		except SQLAlchemyError as e:
 			print(f"Error getting admin setup: {str(e)}")
 			return None
 		finally:
-			db.close()
+			if db is not None:
+				db.close()
 
 	def initialize_default_data(self):
 		"""Initialize database with default data"""
@@ -828,6 +1525,8 @@ class DatabaseManager:
 				description="This is the about page.",
 				status="published",
 			)
+			set_derived_fields(home_page)
+			set_derived_fields(about_page)
 			db.add_all([home_page, about_page])
 
 			# Create default site settings
@@ -1034,7 +1733,7 @@ class DatabaseManager:
 			for item in results['items']:
 				print(f"{item['title']}: {item['url']}")
 		"""
-		db = self.get_session()
+		db = self.get_read_session()
 		try:
 			query = db.query(Media)
 
@@ -1106,7 +1805,7 @@ class DatabaseManager:
 
 	def get_media_by_id(self, media_id):
 		"""Get a media item by ID"""
-		db = self.get_session()
+		db = self.get_read_session()
 		try:
 			media = db.query(Media).filter(Media.id == media_id).first()
 			if media:
@@ -1248,7 +1947,7 @@ class DatabaseManager:
 
 	def get_sitemap_content(self) -> Optional[str]:
 		"""Retrieves the sitemap XML content from the database."""
-		db = self.get_session()
+		db = self.get_read_session()
 		try:
 			sitemap = db.query(Sitemap).first()
 			return sitemap.content if sitemap else None
@@ -1327,7 +2026,7 @@ def get_pages() -> Dict[str, Any]:
 		for slug, page in pages.items():
 			print(f"{page['title']}: {page['description']}")
 	"""
-	db = db_manager.get_session()
+	db = db_manager.get_read_session()
 	try:
 		pages = db.query(Page).filter(Page.status == "published").all()
 		return {page.slug: page.to_dict() for page in pages}
@@ -1340,7 +2039,7 @@ def get_pages() -> Dict[str, Any]:
 
 def get_draft_pages() -> Dict[str, Any]:
 	"""Get all draft pages"""
-	db = db_manager.get_session()
+	db = db_manager.get_read_session()
 	try:
 		pages = db.query(Page).filter(Page.status == "draft").all()
 		return {page.slug: page.to_dict() for page in pages}
@@ -1351,84 +2050,455 @@ def get_draft_pages() -> Dict[str, Any]:
 		db.close()
 
 
-def get_posts() -> Dict[str, Any]:
-	"""Get all published posts"""
-	db = db_manager.get_session()
+def _post_query(db: Session, summary: bool = False):
+	"""
+	Post query with category and tags eager-loaded in two extra SELECTs.
+
+	Content is loaded in the same SELECT unless summary is set, in which case
+	it stays deferred and the posts should be serialized with to_summary().
+	"""
+	query = db.query(Post).options(selectinload(Post.category), selectinload(Post.tags))
+	return query if summary else query.options(undefer(Post.content))
+
+
+def _category_post_counts(db: Session) -> Dict[int, int]:
+	"""Map category id to its number of posts using one GROUP BY query"""
+	rows = (
+		db.query(Post.category_id, func.count(Post.id))
+		.filter(Post.category_id.isnot(None))
+		.group_by(Post.category_id)
+		.all()
+	)
+	return {category_id: count for category_id, count in rows}
+
+
+def _posts_to_dict(db: Session, posts: List[Post]) -> Dict[str, Any]:
+	"""Serialize eager-loaded posts keyed by slug"""
+	category_counts = _category_post_counts(db) if posts else {}
+	return {post.slug: post.to_dict(category_counts) for post in posts}
+
+
+def _posts_to_summaries(db: Session, posts: List[Post]) -> List[Dict[str, Any]]:
+	"""Serialize eager-loaded posts without their content, in order"""
+	category_counts = _category_post_counts(db) if posts else {}
+	return [post.to_summary(category_counts) for post in posts]
+
+
+def _posts_by_ids(db: Session, post_ids: List[int]) -> List[Dict[str, Any]]:
+	"""Summaries (no content) of the given posts in the order of post_ids"""
+	if not post_ids:
+		return []
+	order = {post_id: i for i, post_id in enumerate(post_ids)}
+	posts = _post_query(db, summary=True).filter(Post.id.in_(post_ids)).all()
+	posts.sort(key=lambda post: order[post.id])
+	return _posts_to_summaries(db, posts)
+
+
+def get_published_posts(
+	category_slug: Optional[str] = None,
+	tag_name: Optional[str] = None,
+	summary: bool = False,
+) -> Dict[str, Any]:
+	"""
+	Retrieve published posts, optionally narrowed to a category or tag.
+
+	Category and tags are loaded with selectinload and category post counts
+	come from a single grouped query, so the whole listing costs a fixed
+	number of queries regardless of how many posts are returned.
+
+	Args:
+		category_slug (str): Only return posts in this category (optional)
+		tag_name (str): Only return posts carrying this tag (optional)
+		summary (bool): Leave out post content and never load it (optional)
+
+	Returns:
+		Dict[str, Any]: Post dictionaries keyed by slug, same shape as get_posts()
+	"""
+	db = db_manager.get_read_session()
 	try:
-		posts = db.query(Post).filter(Post.status == "published").all()
-		return {post.slug: post.to_dict() for post in posts}
+		query = _post_query(db, summary=summary).filter(Post.status == "published")
+		if category_slug is not None:
+			query = query.join(Post.category).filter(Category.slug == category_slug)
+		if tag_name is not None:
+			query = query.filter(Post.tags.any(Tag.name == tag_name))
+		posts = query.all()
+		if summary:
+			return {post["slug"]: post for post in _posts_to_summaries(db, posts)}
+		return _posts_to_dict(db, posts)
 	except SQLAlchemyError as e:
-		print(f"Error getting posts: {str(e)}")
+		print(f"Error getting published posts: {str(e)}")
 		return {}
 	finally:
 		db.close()
 
 
-def get_draft_posts() -> Dict[str, Any]:
-	"""Get all draft posts"""
-	db = db_manager.get_session()
+def get_post(slug: str) -> Optional[Dict[str, Any]]:
+	"""Get a single post (any status) by slug with category and tags eager-loaded"""
+	db = db_manager.get_read_session()
 	try:
-		posts = db.query(Post).filter(Post.status == "draft").all()
-		return {post.slug: post.to_dict() for post in posts}
+		post = _post_query(db).filter(Post.slug == slug).first()
+		if not post:
+			return None
+		return _posts_to_dict(db, [post])[post.slug]
 	except SQLAlchemyError as e:
-		print(f"Error getting draft posts: {str(e)}")
-		return {}
+		print(f"Error getting post: {str(e)}")
+		return None
 	finally:
 		db.close()
 
 
-def get_categories() -> Dict[str, Any]:
-	"""Get all categories"""
-	db = db_manager.get_session()
+def get_post_updated_at(slug: str) -> Optional[datetime.datetime]:
+	"""Last modification time of a post, without loading its content"""
+	db = db_manager.get_read_session()
 	try:
-		categories = db.query(Category).all()
-		return {category.slug: category.to_dict() for category in categories}
+		return db.query(Post.updated_at).filter(Post.slug == slug).scalar()
 	except SQLAlchemyError as e:
-		print(f"Error getting categories: {str(e)}")
-		return {}
+		print(f"Error getting post modification time: {str(e)}")
+		return None
 	finally:
 		db.close()
 
 
-def get_tags() -> Dict[str, Any]:
-	"""Get all tags with counts"""
-	db = db_manager.get_session()
+def get_page_updated_at(slug: str) -> Optional[datetime.datetime]:
+	"""Last modification time of a published page, without loading its content"""
+	db = db_manager.get_read_session()
 	try:
-		tags = db.query(Tag).all()
-		return {tag.name: tag.to_dict() for tag in tags}
+		return (
+			db.query(Page.updated_at)
+			.filter(Page.slug == slug, Page.status == "published")
+			.scalar()
+		)
 	except SQLAlchemyError as e:
-		print(f"Error getting tags: {str(e)}")
-		return {}
+		print(f"Error getting page modification time: {str(e)}")
+		return None
 	finally:
 		db.close()
 
 
-def get_site_settings() -> Dict[str, Any]:
+def get_posts(summary: bool = False) -> Dict[str, Any]:
+	"""Get all published posts (without content when summary is set)"""
+	return get_published_posts(summary=summary)
+
+
+# Cached published post counts, keyed by listing filter
+_post_count_cache: Dict[Any, int] = {}
+
+
+@on_commit
+def _invalidate_post_counts(changes):
+	if "posts" in changes or "categories" in changes or "tags" in changes:
+		_post_count_cache.clear()
+
+
+@on_cache_invalidated("posts", "taxonomy")
+def _drop_post_counts(namespace):
+	_post_count_cache.clear()
+
+
+def _published_sort_key():
+	"""Sort column for published listings, served by ix_posts_status_published_at"""
+	return Post.published_at
+
+
+def _encode_cursor(post: Post) -> str:
+	return _encode_keyset(post.published_at or post.created_at, post.id)
+
+
+def _encode_keyset(sort_value: datetime.datetime, post_id: int) -> str:
+	raw = f"{sort_value.isoformat()}|{post_id}"
+	return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str):
+	"""Decode a keyset cursor into (sort datetime, post id), or None if invalid"""
+	try:
+		padded = cursor + "=" * (-len(cursor) % 4)
+		sort_value, post_id = base64.urlsafe_b64decode(padded).decode().split("|")
+		return datetime.datetime.fromisoformat(sort_value), int(post_id)
+	except (ValueError, TypeError, UnicodeDecodeError):
+		return None
+
+
+def count_published_posts(
+	category_id: Optional[int] = None, tag_id: Optional[int] = None
+) -> int:
 	"""
-	Retrieve all site configuration settings.
-	
-	Features:
-		- JSON value parsing
-		- Error handling
-		- Type conversion
-		- Default values
-		- Session management
-	
+	Number of published posts, optionally in one category or with one tag.
+
+	Counts are cached per filter until the next post or taxonomy write in any
+	worker. Category counts are served by ix_posts_category_status_published_at
+	and tag counts by ix_post_tags_tag_id_post_id. With CONTENT_CATALOG they are
+	counted in the content snapshot or catalog instead.
+	"""
+	sync_cache_versions()
+	catalog = _published_catalog()
+	if catalog is not None:
+		return catalog.query("published", category_id, tag_id, limit=0)[0]
+	key = ("published", category_id, tag_id)
+	if key not in _post_count_cache:
+		db = db_manager.get_read_session()
+		try:
+			query = db.query(func.count(Post.id)).filter(Post.status == "published")
+			if category_id is not None:
+				query = query.filter(Post.category_id == category_id)
+			if tag_id is not None:
+				query = query.join(post_tags, post_tags.c.post_id == Post.id).filter(
+					post_tags.c.tag_id == tag_id
+				)
+			_post_count_cache[key] = query.scalar()
+		except SQLAlchemyError as e:
+			print(f"Error counting posts: {str(e)}")
+			return 0
+		finally:
+			db.close()
+	return _post_count_cache[key]
+
+
+def get_published_posts_page(
+	cursor: Optional[str] = None,
+	page: int = 1,
+	limit: int = 10,
+	category_id: Optional[int] = None,
+	tag_id: Optional[int] = None,
+) -> Dict[str, Any]:
+	"""
+	Retrieve one page of published posts, newest first, optionally narrowed
+	to a category or tag archive.
+
+	Ordering and limiting happen in SQL on published_at (backfilled from
+	created_at by migrate_indexes), so the cost of a page does not grow with
+	the number of posts.
+	When a cursor from a previous page is given the page is fetched with a
+	keyset condition instead of OFFSET, which keeps deep pages cheap.
+	Category archives filter on posts.category_id and tag archives join
+	post_tags on tag_id, both through the composite indexes, so archive pages
+	cost the same as home pages. With CONTENT_SNAPSHOT or CONTENT_CATALOG the
+	page is selected in the shared snapshot or in-memory catalog and only its
+	posts are loaded.
+
+	Args:
+		cursor (str): Opaque next_cursor value from a previous call (optional)
+		page (int): 1-based page number, used when no cursor is given
+		limit (int): Posts per page
+		category_id (int): Only posts in this category (optional)
+		tag_id (int): Only posts carrying this tag (optional)
+
 	Returns:
-		Dict[str, Any]: Configuration dictionary containing:
-			- site_title: Site name
-			- site_description: Meta description
-			- theme: Active theme name
+		Dict[str, Any]: Page data containing:
+			- posts: List of post summaries (Post.to_summary(), no content)
+			- total: Total matching published posts (cached counter)
+			- page: Page number, clamped to total_pages when paging by number
+			- total_pages: Number of pages
+			- next_cursor: Cursor for the following page, or None on the last page
+	"""
+	catalog = _published_catalog()
+	if catalog is not None:
+		return _catalog_posts_page(catalog, cursor, page, limit, category_id, tag_id)
+
+	total = count_published_posts(category_id, tag_id)
+	total_pages = max(1, (total + limit - 1) // limit)
+	page = max(1, page)
+	keyset = _decode_cursor(cursor) if cursor else None
+	if keyset is None:
+		page = min(page, total_pages)
+
+	db = db_manager.get_read_session()
+	try:
+		sort_key = _published_sort_key()
+		query = (
+			_post_query(db, summary=True)
+			.filter(Post.status == "published")
+			.order_by(sort_key.desc(), Post.id.desc())
+		)
+		if category_id is not None:
+			query = query.filter(Post.category_id == category_id)
+		if tag_id is not None:
+			query = query.join(post_tags, post_tags.c.post_id == Post.id).filter(
+				post_tags.c.tag_id == tag_id
+			)
+		if keyset is not None:
+			sort_value, post_id = keyset
+			query = query.filter(
+				(sort_key < sort_value) | ((sort_key == sort_value) & (Post.id < post_id))
+			)
+		else:
+			query = query.offset((page - 1) * limit)
+		posts = query.limit(limit + 1).all()
+
+		has_next = len(posts) > limit
+		posts = posts[:limit]
+		post_dicts = _posts_to_summaries(db, posts)
+		return {
+			"posts": post_dicts,
+			"total": total,
+			"page": page,
+			"total_pages": total_pages,
+			"next_cursor": _encode_cursor(posts[-1]) if has_next else None,
+		}
+	except SQLAlchemyError as e:
+		print(f"Error getting posts page: {str(e)}")
+		return {
+			"posts": [],
+			"total": total,
+			"page": page,
+			"total_pages": total_pages,
+			"next_cursor": None,
+		}
+	finally:
+		db.close()
+
+
+def get_draft_posts(summary: bool = False) -> Dict[str, Any]:
+	"""Get all draft posts (without content when summary is set)"""
+	db = db_manager.get_read_session()
+	try:
+		posts = _post_query(db, summary=summary).filter(Post.status == "draft").all()
+		if summary:
+			return {post["slug"]: post for post in _posts_to_summaries(db, posts)}
+		return _posts_to_dict(db, posts)
+	except SQLAlchemyError as e:
+		print(f"Error getting draft posts: {str(e)}")
+		return {}
+	finally:
+		db.close()
+
+
+def get_categories() -> Dict[str, Any]:
+	"""Get all categories"""
+	db = db_manager.get_read_session()
+	try:
+		categories = db.query(Category).all()
+		category_counts = _category_post_counts(db)
+		return {
+			category.slug: category.to_dict(category_counts.get(category.id, 0))
+			for category in categories
+		}
+	except SQLAlchemyError as e:
+		print(f"Error getting categories: {str(e)}")
+		return {}
+	finally:
+		db.close()
+
+
+def get_category(slug: str) -> Optional[Dict[str, Any]]:
+	"""Get a single category by slug, with its published post count"""
+	db = db_manager.get_read_session()
+	try:
+		category = db.query(Category).filter(Category.slug == slug).first()
+	except SQLAlchemyError as e:
+		print(f"Error getting category: {str(e)}")
+		return None
+	finally:
+		db.close()
+	if category is None:
+		return None
+	return category.to_dict(count_published_posts(category_id=category.id))
+
+
+def get_tag(name: str) -> Optional[Dict[str, Any]]:
+	"""Get a single tag by name, with its published post count"""
+	db = db_manager.get_read_session()
+	try:
+		tag = db.query(Tag).filter(Tag.name == name).first()
+	except SQLAlchemyError as e:
+		print(f"Error getting tag: {str(e)}")
+		return None
+	finally:
+		db.close()
+	if tag is None:
+		return None
+	return tag.to_dict(count_published_posts(tag_id=tag.id))
+
+
+def get_tags() -> Dict[str, Any]:
+	"""Get all tags with counts"""
+	db = db_manager.get_read_session()
+	try:
+		# One LEFT JOIN ... GROUP BY instead of loading every tag's posts
+		rows = (
+			db.query(Tag, func.count(Post.id))
+			.outerjoin(post_tags, post_tags.c.tag_id == Tag.id)
+			.outerjoin(
+				Post, (Post.id == post_tags.c.post_id) & (Post.status == "published")
+			)
+			.group_by(Tag.id)
+			.all()
+		)
+		return {tag.name: tag.to_dict(count) for tag, count in rows}
+	except SQLAlchemyError as e:
+		print(f"Error getting tags: {str(e)}")
+		return {}
+	finally:
+		db.close()
+
+
+# (settings version, parsed settings) stored as one tuple so threads never
+# see a version paired with another version's settings
+_settings_cache: Dict[str, Any] = {}
+
+
+@on_commit
+def _invalidate_settings(changes):
+	if "site_settings" in changes:
+		_settings_cache.clear()
+
+
+def get_cache_version(namespace: str, db: Optional[Session] = None) -> Optional[int]:
+	"""
+	Current version of a cache namespace, or None if it cannot be read.
+
+	Reads through the read session unless a session is given.
+	"""
+	owns_session = db is None
+	db = db or db_manager.get_read_session()
+	try:
+		version = (
+			db.query(CacheVersion.version)
+			.filter(CacheVersion.namespace == namespace)
+			.scalar()
+		)
+		return version or 0
+	except SQLAlchemyError as e:
+		print(f"Error getting cache version: {str(e)}")
+		return None
+	finally:
+		if owns_session:
+			db.close()
+
+
+def _settings_version() -> Optional[int]:
+	"""Settings version from the invalidation bus (read once per app context)"""
+	return sync_cache_versions().get("settings")
+
+
+def get_site_settings() -> Dict[str, Any]:
+	"""
+	Retrieve all site configuration settings.
+	
+	Features:
+		- In-process cache keyed by the settings version
+		- JSON value parsing
+		- Error handling
+		- Type conversion
+		- Default values
+		- Session management
+	
+	Returns:
+		Dict[str, Any]: Configuration dictionary containing:
+			- site_title: Site name
+			- site_description: Meta description
+			- theme: Active theme name
 			- menu_items: Navigation structure
 			- custom_settings: Theme-specific options
 			- social_links: Social media URLs
 			- analytics: Analytics configuration
 			
 	Processing:
-		1. Fetch all settings from database
-		2. Parse JSON values where applicable
-		3. Fall back to string values if parsing fails
-		4. Handle missing settings gracefully
+		1. Compare the cached settings version with the database (once per request)
+		2. Return the cached dict if unchanged
+		3. Otherwise fetch all settings and parse JSON values where applicable
+		4. Fall back to string values if parsing fails
+		5. Handle missing settings gracefully
 		
 	Error Handling:
 		- Returns empty dict on database errors
@@ -1441,7 +2511,12 @@ def get_site_settings() -> Dict[str, Any]:
 		theme = settings.get('theme', 'default')
 		title = settings.get('site_title', 'My Site')
 	"""
-	db = db_manager.get_session()
+	version = _settings_version()
+	cached = _settings_cache.get("entry")
+	if version is not None and cached and cached[0] == version:
+		return dict(cached[1])
+
+	db = db_manager.get_read_session()
 	try:
 		settings = db.query(SiteSetting).all()
 		result = {}
@@ -1452,7 +2527,10 @@ def get_site_settings() -> Dict[str, Any]:
 			except (json.JSONDecodeError, TypeError):
 				value = setting.value
 			result[setting.key] = value
-		return result
+		# The version was read before the rows, so a concurrent bump is never missed
+		if version is not None:
+			_settings_cache["entry"] = (version, result)
+		return dict(result)
 	except SQLAlchemyError as e:
 		print(f"Error getting site settings: {str(e)}")
 		return {}
@@ -1471,6 +2549,7 @@ def add_page(slug: str, page_data: Dict[str, Any]) -> bool:
 			description=page_data.get("description", ""),
 			status=page_data.get("status", "published"),
 		)
+		set_derived_fields(page)
 		db.add(page)
 		db.commit()
 		return True
@@ -1528,7 +2607,7 @@ def add_post(slug: str, post_data: Dict[str, Any]) -> bool:
 			category_id=category.id if category else None,
 			published_at=(
 				datetime.datetime.utcnow()
-				if post_data.get("status") == "published"
+				if post_data.get("status", "published") == "published"
 				else None
 			),
 		)
@@ -1542,6 +2621,7 @@ def add_post(slug: str, post_data: Dict[str, Any]) -> bool:
 					db.add(tag)
 				post.tags.append(tag)
 
+		set_derived_fields(post)
 		db.add(post)
 		db.commit()
 		return True
@@ -1660,11 +2740,1499 @@ def update_site_settings(settings_data: Dict[str, Any]) -> bool:
 
 def update_tag_counts() -> Dict[str, Any]:
 	"""Recalculate tag counts based on published posts"""
-	# This is automatically handled by the relationship and to_dict method
+	# Counts are aggregated by get_tags() in a single grouped query
 	return get_tags()
 
 
+# Full-text search
+# Published posts are mirrored into a search table that an on_commit listener
+# keeps in step with post and tag writes: an FTS5 virtual table on SQLite and
+# a table with a FULLTEXT index on MySQL. Other databases, or SQLite builds
+# without FTS5, fall back to LIKE matching on the posts table.
+SEARCH_SNIPPET_WORDS = 24
+_search_state: Dict[str, Any] = {"backend": None}
+_search_lock = threading.Lock()
+_SEARCH_TERM_RE = re.compile(r"\w+")
+# Highlight markers put in FTS5 snippets, swapped for <mark> after escaping
+_MARK_OPEN, _MARK_CLOSE = "\x02", "\x03"
+
+
+def _search_terms(query: str) -> List[str]:
+	"""Lower-cased words of a search query (at most 16)"""
+	return _SEARCH_TERM_RE.findall(query.lower())[:16]
+
+
+def _search_backend() -> str:
+	"""
+	Return "memory" (SEARCH_BACKEND=memory), else create the database search
+	index on first use and return "fts5", "fulltext" or "like"
+	"""
+	if _search_state["backend"] is None:
+		with _search_lock:
+			if _search_state["backend"] is None:
+				if SEARCH_BACKEND == "memory":
+					_search_state["backend"] = "memory"
+				else:
+					_search_state["backend"] = _create_search_index()
+	return _search_state["backend"]
+
+
+def _create_search_index() -> str:
+	dialect = engine.dialect.name
+	if dialect not in ("sqlite", "mysql"):
+		return "like"
+	try:
+		with engine.begin() as conn:
+			if dialect == "sqlite":
+				backend = "fts5"
+				created = not conn.exec_driver_sql(
+					"SELECT 1 FROM sqlite_master WHERE name = 'posts_fts'"
+				).first()
+				conn.exec_driver_sql(
+					"CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5("
+					"title, excerpt, tags, body, tokenize = 'unicode61 remove_diacritics 2')"
+				)
+			else:
+				backend = "fulltext"
+				created = not inspect(conn).has_table("post_search")
+				conn.exec_driver_sql(
+					"CREATE TABLE IF NOT EXISTS post_search ("
+					"post_id INT PRIMARY KEY, title TEXT, excerpt TEXT, tags TEXT, body MEDIUMTEXT, "
+					"FULLTEXT INDEX ft_post_search (title, excerpt, tags, body)"
+					") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"
+				)
+			if created:
+				_index_posts(conn, backend)
+		return backend
+	except SQLAlchemyError as e:
+		print(f"Full-text search unavailable, using LIKE matching: {str(e)}")
+		return "like"
+
+
+def _search_documents(conn, post_ids=None) -> List[Dict[str, Any]]:
+	"""Plain-text search documents for published posts (all, or the given ids)"""
+	stmt = select(Post.id, Post.title, Post.excerpt, Post.content, Post.updated_at).where(
+		Post.status == "published"
+	)
+	tag_stmt = select(post_tags.c.post_id, Tag.name).join(Tag, Tag.id == post_tags.c.tag_id)
+	if post_ids is not None:
+		stmt = stmt.where(Post.id.in_(post_ids))
+		tag_stmt = tag_stmt.where(post_tags.c.post_id.in_(post_ids))
+
+	tags: Dict[int, List[str]] = {}
+	for post_id, name in conn.execute(tag_stmt):
+		tags.setdefault(post_id, []).append(name)
+	return [
+		{
+			"id": post_id,
+			"title": title or "",
+			"excerpt": _plain_text(excerpt),
+			"tags": " ".join(tags.get(post_id, [])),
+			"body": _plain_text(content),
+			"updated_at": updated_at,
+		}
+		for post_id, title, excerpt, content, updated_at in conn.execute(stmt)
+	]
+
+
+def _index_posts(conn, backend: str, post_ids=None) -> int:
+	"""Replace the search documents of the given posts (all posts if None)"""
+	table, key = ("posts_fts", "rowid") if backend == "fts5" else ("post_search", "post_id")
+	if post_ids is None:
+		conn.exec_driver_sql(f"DELETE FROM {table}")
+	else:
+		post_ids = list(post_ids)
+		conn.execute(
+			text(f"DELETE FROM {table} WHERE {key} IN :ids").bindparams(
+				bindparam("ids", expanding=True)
+			),
+			{"ids": post_ids},
+		)
+	documents = _search_documents(conn, post_ids)
+	if documents:
+		conn.execute(
+			text(
+				f"INSERT INTO {table} ({key}, title, excerpt, tags, body) "
+				"VALUES (:id, :title, :excerpt, :tags, :body)"
+			),
+			[
+				{field: document[field] for field in ("id", "title", "excerpt", "tags", "body")}
+				for document in documents
+			],
+		)
+	return len(documents)
+
+
+def rebuild_search_index() -> int:
+	"""
+	Re-index every published post.
+
+	Returns:
+		int: Number of documents indexed (0 when using LIKE matching)
+	"""
+	backend = _search_backend()
+	if backend == "like":
+		return 0
+	if backend == "memory":
+		index = _build_memory_index()
+		_memory_index["index"] = index
+		_save_memory_index(index)
+		return len(index)
+	with engine.begin() as conn:
+		return _index_posts(conn, backend)
+
+
+@on_commit
+def _sync_search_index(changes):
+	"""Re-index the posts touched by a commit (tag renames reach their posts)"""
+	post_ids = set(changes.get("posts", ()))
+	tag_ids = set(changes.get("tags", ()))
+	if not post_ids and not tag_ids:
+		return
+	backend = _search_backend()
+	if backend not in ("fts5", "fulltext"):
+		return
+	try:
+		with engine.begin() as conn:
+			if tag_ids:
+				post_ids.update(
+					conn.execute(
+						select(post_tags.c.post_id).where(post_tags.c.tag_id.in_(tag_ids))
+					).scalars()
+				)
+			if post_ids:
+				_index_posts(conn, backend, post_ids)
+	except SQLAlchemyError as e:
+		print(f"Error updating search index: {str(e)}")
+
+
+# In-process search index (SEARCH_BACKEND=memory)
+# A utils.search_index.SearchIndex over published posts, for deployments
+# without FTS5. Like the database backends it covers posts only. It is built
+# at startup, from the snapshot at SEARCH_INDEX_PATH when one exists, and is
+# updated by this worker's commits. When another worker bumps posts or
+# taxonomy, it is diff-synced against the database by comparing updated_at
+# stamps. A tag rename does not
+# touch its posts' stamps, so other workers only pick it up on rebuild.
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "database").lower()
+SEARCH_INDEX_PATH = os.getenv(
+	"SEARCH_INDEX_PATH",
+	os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "search_index.pickle"),
+)
+SEARCH_INDEX_SAVE_INTERVAL = float(os.getenv("SEARCH_INDEX_SAVE_INTERVAL", 300))
+_memory_index: Dict[str, Any] = {"index": None, "saved_at": 0.0}
+_memory_index_lock = threading.Lock()
+
+
+def _stamp(moment: Optional[datetime.datetime]) -> float:
+	return moment.timestamp() if moment else 0.0
+
+
+def _memory_documents(conn, post_ids=None) -> List[Any]:
+	"""(key, fields, stamp) for published posts (all, or the given ids)"""
+	documents = []
+	if post_ids is None or post_ids:
+		for document in _search_documents(conn, post_ids):
+			fields = {field: document[field] for field in ("title", "excerpt", "tags", "body")}
+			documents.append((f"post:{document['id']}", fields, _stamp(document["updated_at"])))
+	return documents
+
+
+def _build_memory_index() -> SearchIndex:
+	with engine.connect() as conn:
+		return build_index(_memory_documents(conn))
+
+
+def _save_memory_index(index: SearchIndex):
+	_memory_index["saved_at"] = time.monotonic()
+	try:
+		index.save(SEARCH_INDEX_PATH, {"built_at": time.time()})
+	except OSError as e:
+		print(f"Error saving search index snapshot: {str(e)}")
+
+
+def _diff_sync_memory_index(index: SearchIndex) -> int:
+	"""
+	Re-index documents whose updated_at changed and drop unpublished ones
+	(and any page documents left in snapshots from before pages were dropped)
+	"""
+	published_posts = select(Post.id, Post.updated_at).where(Post.status == "published")
+	with engine.connect() as conn:
+		current = {
+			f"post:{post_id}": _stamp(updated_at)
+			for post_id, updated_at in conn.execute(published_posts)
+		}
+		stamps = index.stamps()
+		stale = [key for key, stamp in current.items() if stamps.get(key) != stamp]
+		post_ids = [int(key[5:]) for key in stale]
+		documents = _memory_documents(conn, post_ids) if stale else []
+
+	removed = [key for key in stamps if key not in current]
+	for key in removed:
+		index.remove(key)
+	for key, fields, stamp in documents:
+		index.add(key, fields, stamp)
+	return len(removed) + len(documents)
+
+
+def get_search_index() -> SearchIndex:
+	"""
+	The in-process search index, loaded or built on first use.
+
+	A snapshot on disk is loaded and brought up to date with a diff sync, so
+	workers start without re-indexing everything.
+	"""
+	if _memory_index["index"] is None:
+		with _memory_index_lock:
+			if _memory_index["index"] is None:
+				loaded = SearchIndex.load(SEARCH_INDEX_PATH)
+				if loaded is not None:
+					index = loaded[0]
+					if _diff_sync_memory_index(index):
+						_save_memory_index(index)
+				else:
+					index = _build_memory_index()
+					_save_memory_index(index)
+				_memory_index["index"] = index
+	return _memory_index["index"]
+
+
+def warm_search_index():
+	"""Prepare the configured search backend so the first search is fast"""
+	if _search_backend() == "memory":
+		get_search_index()
+
+
+def _maybe_save_memory_index(index: SearchIndex):
+	if time.monotonic() - _memory_index["saved_at"] >= SEARCH_INDEX_SAVE_INTERVAL:
+		_save_memory_index(index)
+
+
+@on_commit
+def _update_memory_index(changes):
+	"""Re-index the posts touched by a commit in this worker"""
+	index = _memory_index["index"]
+	if index is None:
+		return
+	post_ids = set(changes.get("posts", ()))
+	tag_ids = set(changes.get("tags", ()))
+	if not post_ids and not tag_ids:
+		return
+	try:
+		with engine.connect() as conn:
+			if tag_ids:
+				post_ids.update(
+					conn.execute(
+						select(post_tags.c.post_id).where(post_tags.c.tag_id.in_(tag_ids))
+					).scalars()
+				)
+			documents = _memory_documents(conn, post_ids)
+	except SQLAlchemyError as e:
+		print(f"Error updating search index: {str(e)}")
+		return
+	for post_id in post_ids:
+		index.remove(f"post:{post_id}")
+	for key, fields, stamp in documents:
+		index.add(key, fields, stamp)
+	_maybe_save_memory_index(index)
+
+
+@on_cache_invalidated("posts", "taxonomy")
+def _refresh_memory_index(namespace):
+	"""Catch up with writes made by other workers"""
+	index = _memory_index["index"]
+	if index is None:
+		return
+	try:
+		if _diff_sync_memory_index(index):
+			_maybe_save_memory_index(index)
+	except SQLAlchemyError as e:
+		print(f"Error syncing search index: {str(e)}")
+
+
+def _highlight(plain: str, terms: List[str], words: int = SEARCH_SNIPPET_WORDS) -> Markup:
+	"""Escaped window of plain text around the first matching word, matches in <mark>"""
+	tokens = plain.split()
+	if not tokens:
+		return Markup("")
+
+	def matches(token):
+		token = token.lower()
+		return any(term in token for term in terms)
+
+	first = next((i for i, token in enumerate(tokens) if matches(token)), 0)
+	start = max(0, first - words // 3)
+	window = tokens[start:start + words]
+	parts = [
+		f"<mark>{escape(token)}</mark>" if matches(token) else str(escape(token))
+		for token in window
+	]
+	prefix = "… " if start > 0 else ""
+	suffix = " …" if start + words < len(tokens) else ""
+	return Markup(prefix + " ".join(parts) + suffix)
+
+
+def _fts5_snippet(snippet: Optional[str]) -> Markup:
+	"""Escape an FTS5 snippet, then turn its highlight markers into <mark> tags"""
+	escaped = str(escape(snippet or ""))
+	return Markup(escaped.replace(_MARK_OPEN, "<mark>").replace(_MARK_CLOSE, "</mark>"))
+
+
+def _search_hits(db: Session, backend: str, terms: List[str], limit: int, offset: int):
+	"""
+	Total match count and one page of (post id, snippet) in rank order; the
+	snippet is None when it is to be cut from the loaded post
+	"""
+	if backend == "fts5":
+		match = " ".join(f'"{term}"' for term in terms[:-1])
+		match = f'{match} "{terms[-1]}"*'.strip()
+		total = db.execute(
+			text("SELECT count(*) FROM posts_fts WHERE posts_fts MATCH :match"),
+			{"match": match},
+		).scalar()
+		rows = db.execute(
+			text(
+				"SELECT rowid, snippet(posts_fts, 3, :open, :close, '…', :words) "
+				"FROM posts_fts WHERE posts_fts MATCH :match "
+				"ORDER BY bm25(posts_fts, 10.0, 4.0, 6.0, 1.0) LIMIT :limit OFFSET :offset"
+			),
+			{
+				"match": match,
+				"open": _MARK_OPEN,
+				"close": _MARK_CLOSE,
+				"words": SEARCH_SNIPPET_WORDS,
+				"limit": limit,
+				"offset": offset,
+			},
+		).all()
+		return total, [(post_id, _fts5_snippet(snippet)) for post_id, snippet in rows]
+
+	if backend == "memory":
+		total, hits = get_search_index().search(" ".join(terms), limit, offset, kind="post")
+		return total, [(int(key.split(":", 1)[1]), None) for key, _ in hits]
+
+	if backend == "fulltext":
+		against = " ".join(f"+{term}*" for term in terms)
+		match = "MATCH(title, excerpt, tags, body) AGAINST (:against IN BOOLEAN MODE)"
+		total = db.execute(
+			text(f"SELECT count(*) FROM post_search WHERE {match}"), {"against": against}
+		).scalar()
+		rows = db.execute(
+			text(
+				f"SELECT post_id, body FROM post_search WHERE {match} "
+				f"ORDER BY {match} DESC LIMIT :limit OFFSET :offset"
+			),
+			{"against": against, "limit": limit, "offset": offset},
+		).all()
+		return total, [(post_id, _highlight(body, terms)) for post_id, body in rows]
+
+	conditions = [Post.status == "published"]
+	for term in terms:
+		pattern = f"%{term}%"
+		conditions.append(
+			or_(
+				Post.title.ilike(pattern),
+				Post.content.ilike(pattern),
+				Post.excerpt.ilike(pattern),
+				Post.tags.any(Tag.name.ilike(pattern)),
+			)
+		)
+	total = db.query(func.count(Post.id)).filter(*conditions).scalar()
+	rows = (
+		db.query(Post.id)
+		.filter(*conditions)
+		.order_by(_published_sort_key().desc(), Post.id.desc())
+		.limit(limit)
+		.offset(offset)
+		.all()
+	)
+	return total, [(post_id, None) for post_id, in rows]
+
+
+def search_posts(query: str, page: int = 1, per_page: int = 10) -> Dict[str, Any]:
+	"""
+	Ranked full-text search over published posts.
+
+	Every word of the query must match (the last one as a prefix) in the title,
+	excerpt, tags or body. Results are ranked by relevance (BM25 on SQLite,
+	FULLTEXT score on MySQL; newest first with the LIKE fallback), and only
+	the requested page of posts is loaded.
+	SEARCH_BACKEND=memory ranks with the in-process BM25 index instead.
+
+	Args:
+		query (str): Search text as typed by the visitor
+		page (int): 1-based page number
+		per_page (int): Results per page
+
+	Returns:
+		Dict[str, Any]: Page data containing:
+			- posts: List of post summaries (no content), each with an HTML-safe "snippet"
+			- total: Number of matching posts
+			- page: Page number
+			- total_pages: Number of pages
+	"""
+	terms = _search_terms(query)
+	page = max(1, page)
+	empty = {"posts": [], "total": 0, "page": page, "total_pages": 1}
+	if not terms:
+		return empty
+
+	backend = _search_backend()
+	if backend == "memory":
+		# Catches up with other workers' writes before querying
+		sync_cache_versions()
+	db = db_manager.get_read_session()
+	try:
+		total, hits = _search_hits(db, backend, terms, per_page, (page - 1) * per_page)
+		posts = {}
+		if hits:
+			# Bodies are only needed to build snippets the backend did not provide
+			summary = all(snippet is not None for _, snippet in hits)
+			loaded = (
+				_post_query(db, summary=summary)
+				.filter(Post.id.in_([post_id for post_id, _ in hits]))
+				.all()
+			)
+			posts = {post.id: post for post in loaded}
+		category_counts = _category_post_counts(db) if posts else {}
+
+		results = []
+		for post_id, snippet in hits:
+			post = posts.get(post_id)
+			if post is None or post.status != "published":
+				continue
+			post_dict = post.to_summary(category_counts)
+			if snippet is None:
+				snippet = _highlight(_plain_text(post.content), terms)
+			post_dict["snippet"] = snippet
+			results.append(post_dict)
+		return {
+			"posts": results,
+			"total": total,
+			"page": page,
+			"total_pages": max(1, (total + per_page - 1) // per_page),
+		}
+	except SQLAlchemyError as e:
+		print(f"Error searching posts: {str(e)}")
+		return empty
+	finally:
+		db.close()
+
+
+# Search suggestions
+# A utils.suggest_index.SuggestIndex over published post titles and tag and
+# category names. Tags and categories are weighted by their number of
+# published posts. Built on first use, updated by this worker's commits, and
+# dropped for a rebuild when another worker bumps posts or taxonomy.
+_suggest_state: Dict[str, Any] = {"index": None}
+_suggest_lock = threading.Lock()
+
+
+def _post_suggestions(conn, post_ids=None) -> List[Any]:
+	stmt = select(Post.id, Post.title, Post.slug).where(Post.status == "published")
+	if post_ids is not None:
+		stmt = stmt.where(Post.id.in_(post_ids))
+	return [
+		(f"post:{post_id}", title, f"/post/{slug}", "post", 1.0)
+		for post_id, title, slug in conn.execute(stmt)
+		if title
+	]
+
+
+def _taxonomy_suggestions(conn) -> List[Any]:
+	published = (Post.id == post_tags.c.post_id) & (Post.status == "published")
+	tags = conn.execute(
+		select(Tag.id, Tag.name, func.count(Post.id))
+		.outerjoin(post_tags, post_tags.c.tag_id == Tag.id)
+		.outerjoin(Post, published)
+		.group_by(Tag.id, Tag.name)
+	)
+	categories = conn.execute(
+		select(Category.id, Category.name, Category.slug, func.count(Post.id))
+		.outerjoin(Post, (Post.category_id == Category.id) & (Post.status == "published"))
+		.group_by(Category.id, Category.name, Category.slug)
+	)
+	# Empty tags and categories would lead to empty archives
+	entries = [
+		(f"tag:{tag_id}", name, f"/tag/{name}", "tag", float(count))
+		for tag_id, name, count in tags
+		if count
+	]
+	entries.extend(
+		(f"category:{category_id}", name, f"/category/{slug}", "category", float(count))
+		for category_id, name, slug, count in categories
+		if count
+	)
+	return entries
+
+
+def get_suggest_index() -> SuggestIndex:
+	"""The search suggestion index, built on first use"""
+	index = _suggest_state["index"]
+	if index is None:
+		with _suggest_lock:
+			index = _suggest_state["index"]
+			if index is None:
+				with engine.connect() as conn:
+					index = SuggestIndex.build(_post_suggestions(conn) + _taxonomy_suggestions(conn))
+				_suggest_state["index"] = index
+	return index
+
+
+def suggest(query: str, limit: int = 8) -> List[Dict[str, Any]]:
+	"""
+	Typeahead suggestions for a partial search query.
+
+	Args:
+		query (str): What the visitor typed so far
+		limit (int): Maximum number of suggestions
+
+	Returns:
+		List[Dict[str, Any]]: Suggestions with label, url and type ("post",
+			"tag" or "category"), best first
+	"""
+	sync_cache_versions()
+	try:
+		index = get_suggest_index()
+	except SQLAlchemyError as e:
+		print(f"Error building suggestion index: {str(e)}")
+		return []
+	return [
+		{"label": entry.label, "url": entry.url, "type": entry.kind}
+		for entry in index.suggest(query, limit)
+	]
+
+
+@on_commit
+def _update_suggest_index(changes):
+	"""Refresh the entries of the posts, tags and categories touched by a commit"""
+	index = _suggest_state["index"]
+	if index is None:
+		return
+	post_ids = set(changes.get("posts", ()))
+	if not post_ids and "tags" not in changes and "categories" not in changes:
+		return
+	try:
+		with engine.connect() as conn:
+			posts = _post_suggestions(conn, post_ids) if post_ids else []
+			taxonomy = _taxonomy_suggestions(conn)
+	except SQLAlchemyError as e:
+		print(f"Error updating suggestion index: {str(e)}")
+		_suggest_state["index"] = None
+		return
+
+	for post_id in post_ids:
+		index.remove(f"post:{post_id}")
+	current = {entry[0] for entry in taxonomy}
+	for key in index.keys("tag") + index.keys("category"):
+		if key not in current:
+			index.remove(key)
+	for key, label, url, kind, weight in posts + taxonomy:
+		index.add(key, label, url, kind, weight)
+
+
+@on_cache_invalidated("posts", "taxonomy")
+def _drop_suggest_index(namespace):
+	"""Another worker changed posts or taxonomy: rebuild on next use"""
+	_suggest_state["index"] = None
+
+
+# Related posts
+# Each published post's RELATED_POSTS_STORED best neighbours live in
+# related_posts. Similarity is the Jaccard index of the two posts' tag sets
+# with every tag weighted by its inverse document frequency (sharing a rare
+# tag counts more than sharing a common one), plus RELATED_CATEGORY_AFFINITY
+# when both posts are in the same category. A commit recomputes only the
+# posts it can affect, including those of written or deleted tags. Tag
+# weights drift slightly as the corpus grows until the next
+# rebuild_related_posts().
+RELATED_POSTS_STORED = 6
+RELATED_CATEGORY_AFFINITY = float(os.getenv("RELATED_CATEGORY_AFFINITY", 0.25))
+# Tags on more posts than this are too common to bring in candidates
+RELATED_MAX_TAG_FANOUT = int(os.getenv("RELATED_MAX_TAG_FANOUT", 500))
+# Most recent posts of the same category considered as candidates
+RELATED_CATEGORY_CANDIDATES = 20
+_related_state: Dict[str, Any] = {"backfilled": False}
+
+
+def _post_tag_rows(conn, post_ids=None, tag_ids=None):
+	"""(post_id, tag_id) pairs of published posts"""
+	stmt = select(post_tags.c.post_id, post_tags.c.tag_id).join(
+		Post, (Post.id == post_tags.c.post_id) & (Post.status == "published")
+	)
+	if post_ids is not None:
+		stmt = stmt.where(post_tags.c.post_id.in_(post_ids))
+	if tag_ids is not None:
+		stmt = stmt.where(post_tags.c.tag_id.in_(tag_ids))
+	return conn.execute(stmt).all()
+
+
+def _tag_frequencies(conn, tag_ids) -> Dict[int, int]:
+	"""Number of published posts carrying each tag"""
+	if not tag_ids:
+		return {}
+	return dict(
+		conn.execute(
+			select(post_tags.c.tag_id, func.count())
+			.join(Post, (Post.id == post_tags.c.post_id) & (Post.status == "published"))
+			.where(post_tags.c.tag_id.in_(tag_ids))
+			.group_by(post_tags.c.tag_id)
+		).all()
+	)
+
+
+def _recent_in_categories(conn, category_ids) -> List[int]:
+	"""Ids of the most recent published posts of each category"""
+	ids = []
+	for category_id in category_ids:
+		ids.extend(
+			conn.execute(
+				select(Post.id)
+				.where(Post.category_id == category_id, Post.status == "published")
+				.order_by(Post.published_at.desc(), Post.id.desc())
+				.limit(RELATED_CATEGORY_CANDIDATES)
+			).scalars()
+		)
+	return ids
+
+
+def _related_data(conn, target_ids=None):
+	"""
+	Everything needed to rank neighbours for target_ids (all published posts
+	if None): published post count, {post id: (category id, recency)} for the
+	targets and their candidates, their tag sets, and tag frequencies.
+	"""
+	published = Post.status == "published"
+	total = conn.execute(select(func.count(Post.id)).where(published)).scalar() or 0
+
+	def load_posts(post_ids=None):
+		stmt = select(Post.id, Post.category_id, Post.published_at).where(published)
+		if post_ids is not None:
+			stmt = stmt.where(Post.id.in_(post_ids))
+		return {
+			post_id: (category_id, _stamp(published_at))
+			for post_id, category_id, published_at in conn.execute(stmt)
+		}
+
+	tags_by_post: Dict[int, set] = {}
+	if target_ids is None:
+		posts = load_posts()
+		for post_id, tag_id in _post_tag_rows(conn):
+			tags_by_post.setdefault(post_id, set()).add(tag_id)
+		frequencies: Dict[int, int] = {}
+		for tags in tags_by_post.values():
+			for tag_id in tags:
+				frequencies[tag_id] = frequencies.get(tag_id, 0) + 1
+		return total, posts, tags_by_post, frequencies
+
+	posts = load_posts(target_ids)
+	for post_id, tag_id in _post_tag_rows(conn, post_ids=list(posts)):
+		tags_by_post.setdefault(post_id, set()).add(tag_id)
+	target_tags = set().union(*tags_by_post.values()) if tags_by_post else set()
+	frequencies = _tag_frequencies(conn, target_tags)
+	uncommon = [tag_id for tag_id in target_tags if frequencies.get(tag_id, 0) <= RELATED_MAX_TAG_FANOUT]
+
+	candidate_ids = set()
+	if uncommon:
+		candidate_ids.update(post_id for post_id, _ in _post_tag_rows(conn, tag_ids=uncommon))
+	categories = {category_id for category_id, _ in posts.values() if category_id}
+	candidate_ids.update(_recent_in_categories(conn, categories))
+	candidate_ids.difference_update(posts)
+	if candidate_ids:
+		posts.update(load_posts(candidate_ids))
+		extra_tags = set()
+		for post_id, tag_id in _post_tag_rows(conn, post_ids=list(candidate_ids)):
+			tags_by_post.setdefault(post_id, set()).add(tag_id)
+			if tag_id not in frequencies:
+				extra_tags.add(tag_id)
+		frequencies.update(_tag_frequencies(conn, extra_tags))
+	return total, posts, tags_by_post, frequencies
+
+
+def _rank_related(total, posts, tags_by_post, frequencies, target_ids) -> Dict[int, List[Any]]:
+	"""Best (neighbour id, score) pairs for each published target"""
+
+	def weight(tag_id):
+		return math.log(1 + total / max(frequencies.get(tag_id, 1), 1))
+
+	postings: Dict[int, List[int]] = {}
+	for post_id, tags in tags_by_post.items():
+		for tag_id in tags:
+			if frequencies.get(tag_id, 0) <= RELATED_MAX_TAG_FANOUT:
+				postings.setdefault(tag_id, []).append(post_id)
+	by_category: Dict[int, List[int]] = {}
+	for post_id, (category_id, _) in posts.items():
+		if category_id:
+			by_category.setdefault(category_id, []).append(post_id)
+	for category_id, post_ids in by_category.items():
+		by_category[category_id] = heapq.nlargest(
+			RELATED_CATEGORY_CANDIDATES, post_ids, key=lambda post_id: (posts[post_id][1], post_id)
+		)
+
+	ranked = {}
+	for target in target_ids:
+		if target not in posts:
+			continue
+		category_id = posts[target][0]
+		tags = tags_by_post.get(target, set())
+		candidates = set(by_category.get(category_id, ()))
+		for tag_id in tags:
+			candidates.update(postings.get(tag_id, ()))
+		candidates.discard(target)
+
+		scored = []
+		for candidate in candidates:
+			other_tags = tags_by_post.get(candidate, set())
+			shared = tags & other_tags
+			score = 0.0
+			if shared:
+				score = sum(weight(t) for t in shared) / sum(weight(t) for t in tags | other_tags)
+			if category_id and posts[candidate][0] == category_id:
+				score += RELATED_CATEGORY_AFFINITY
+			if score > 0:
+				scored.append((score, posts[candidate][1], candidate))
+		ranked[target] = [
+			(candidate, score)
+			for score, _, candidate in heapq.nlargest(RELATED_POSTS_STORED, scored)
+		]
+	return ranked
+
+
+def _store_related(conn, ranked, target_ids=None):
+	"""Replace the stored neighbours of target_ids (of every post if None)"""
+	table = RelatedPost.__table__
+	if target_ids is None:
+		conn.execute(delete(table))
+	else:
+		conn.execute(delete(table).where(table.c.post_id.in_(list(target_ids))))
+	rows = [
+		{"post_id": post_id, "rank": rank, "related_post_id": related_id, "score": score}
+		for post_id, neighbours in ranked.items()
+		for rank, (related_id, score) in enumerate(neighbours)
+	]
+	if rows:
+		conn.execute(insert(table), rows)
+
+
+def rebuild_related_posts() -> int:
+	"""
+	Recompute the neighbours of every published post.
+
+	Returns:
+		int: Number of posts with at least one related post
+	"""
+	with engine.begin() as conn:
+		total, posts, tags_by_post, frequencies = _related_data(conn)
+		ranked = _rank_related(total, posts, tags_by_post, frequencies, list(posts))
+		ranked = {post_id: neighbours for post_id, neighbours in ranked.items() if neighbours}
+		_store_related(conn, ranked)
+	_related_state["backfilled"] = True
+	return len(ranked)
+
+
+@on_commit
+def _update_related_posts(changes):
+	"""
+	Recompute the posts a commit can affect: the written posts and the posts
+	carrying a written tag (a tag's post count sets its weight), the posts
+	listing them as neighbours, the posts sharing an uncommon tag with them
+	and the recent posts of their categories.
+
+	Writes to post_tags made outside the ORM are not seen; run
+	rebuild_related_posts() after them.
+	"""
+	post_ids = set(changes.get("posts", ()))
+	written_tags = {tag_id for tag_id in changes.get("tags", ()) if tag_id is not None}
+	if not post_ids and not written_tags:
+		return
+	table = RelatedPost.__table__
+	try:
+		with engine.begin() as conn:
+			if written_tags:
+				frequencies = _tag_frequencies(conn, written_tags)
+				uncommon = [
+					t for t in written_tags if frequencies.get(t, 0) <= RELATED_MAX_TAG_FANOUT
+				]
+				if uncommon:
+					post_ids.update(post_id for post_id, _ in _post_tag_rows(conn, tag_ids=uncommon))
+			post_ids.discard(None)
+			if not post_ids:
+				return
+			affected = set(post_ids)
+			affected.update(
+				conn.execute(
+					select(table.c.post_id).where(table.c.related_post_id.in_(post_ids))
+				).scalars()
+			)
+			tag_ids = {tag_id for _, tag_id in _post_tag_rows(conn, post_ids=post_ids)}
+			frequencies = _tag_frequencies(conn, tag_ids)
+			uncommon = [t for t in tag_ids if frequencies.get(t, 0) <= RELATED_MAX_TAG_FANOUT]
+			if uncommon:
+				affected.update(post_id for post_id, _ in _post_tag_rows(conn, tag_ids=uncommon))
+			categories = conn.execute(
+				select(Post.category_id).where(Post.id.in_(post_ids), Post.category_id.isnot(None))
+			).scalars()
+			affected.update(_recent_in_categories(conn, set(categories)))
+
+			total, posts, tags_by_post, frequencies = _related_data(conn, affected)
+			ranked = _rank_related(total, posts, tags_by_post, frequencies, affected)
+			_store_related(conn, ranked, affected)
+	except SQLAlchemyError as e:
+		print(f"Error updating related posts: {str(e)}")
+
+
+def get_related_posts(post_id: int, limit: int = 3) -> List[Dict[str, Any]]:
+	"""
+	Precomputed related posts of a post, best first, with one indexed query.
+
+	Args:
+		post_id (int): Post id
+		limit (int): Maximum number of related posts
+
+	Returns:
+		List[Dict[str, Any]]: Related posts with slug, title, excerpt, category
+			(name and slug, or None), created_at, published_at, plain_excerpt and
+			publish_date
+	"""
+	if not _related_state["backfilled"]:
+		_backfill_related_posts()
+	db = db_manager.get_read_session()
+	try:
+		rows = (
+			db.query(
+				Post.slug,
+				Post.title,
+				Post.excerpt,
+				Post.created_at,
+				Post.published_at,
+				Post.plain_excerpt,
+				Post.publish_date,
+				Category.name.label("category_name"),
+				Category.slug.label("category_slug"),
+			)
+			.join(RelatedPost, RelatedPost.related_post_id == Post.id)
+			.outerjoin(Category, Category.id == Post.category_id)
+			.filter(RelatedPost.post_id == post_id, Post.status == "published")
+			.order_by(RelatedPost.rank)
+			.limit(limit)
+			.all()
+		)
+		return [
+			{
+				"slug": row.slug,
+				"title": row.title,
+				"excerpt": row.excerpt,
+				"category": (
+					{"name": row.category_name, "slug": row.category_slug}
+					if row.category_slug
+					else None
+				),
+				"created_at": row.created_at.isoformat() if row.created_at else None,
+				"published_at": row.published_at.isoformat() if row.published_at else None,
+				"plain_excerpt": row.plain_excerpt,
+				"publish_date": row.publish_date.isoformat() if row.publish_date else None,
+			}
+			for row in rows
+		]
+	except SQLAlchemyError as e:
+		print(f"Error getting related posts: {str(e)}")
+		return []
+	finally:
+		db.close()
+
+
+def _backfill_related_posts():
+	"""Fill related_posts once for databases that predate it"""
+	_related_state["backfilled"] = True
+	try:
+		with engine.connect() as conn:
+			if conn.execute(select(RelatedPost.post_id).limit(1)).first() is not None:
+				return
+		rebuild_related_posts()
+	except SQLAlchemyError as e:
+		print(f"Error backfilling related posts: {str(e)}")
+
+
+# Tag index
+# Membership of published posts in every tag, kept in memory as sorted post id
+# arrays (utils.tag_index) for multi-tag archives and facet counts. Built on
+# first use, updated per post and per tag on commit, and rebuilt after another
+# worker's post or taxonomy writes.
+TAG_FACETS_SHOWN = 12
+
+_tag_index_state: Dict[str, Any] = {"index": None, "tag_names": {}}
+_tag_index_lock = threading.Lock()
+
+
+def _tag_index_rows(conn, post_ids=None):
+	"""(post id, tag names, stamp) of published posts, and the tag id -> name map"""
+	query = (
+		select(Post.id, Post.published_at, Post.created_at, Tag.id, Tag.name)
+		.join(post_tags, post_tags.c.post_id == Post.id)
+		.join(Tag, Tag.id == post_tags.c.tag_id)
+		.where(Post.status == "published")
+	)
+	if post_ids is not None:
+		query = query.where(Post.id.in_(post_ids))
+	posts: Dict[int, Any] = {}
+	tag_names: Dict[int, str] = {}
+	for post_id, published_at, created_at, tag_id, tag_name in conn.execute(query):
+		sort_value = published_at or created_at
+		entry = posts.setdefault(
+			post_id, ([], sort_value.timestamp() if sort_value else 0.0)
+		)
+		entry[0].append(tag_name)
+		tag_names[tag_id] = tag_name
+	return [(post_id, tags, stamp) for post_id, (tags, stamp) in posts.items()], tag_names
+
+
+def get_tag_index() -> TagIndex:
+	"""The tag membership index, built on first use"""
+	index = _tag_index_state["index"]
+	if index is None:
+		with _tag_index_lock:
+			index = _tag_index_state["index"]
+			if index is None:
+				with engine.connect() as conn:
+					rows, tag_names = _tag_index_rows(conn)
+				index = TagIndex.build(rows)
+				_tag_index_state["tag_names"] = tag_names
+				_tag_index_state["index"] = index
+	return index
+
+
+def get_tag_facets(
+	tag_names: List[str], mode: str = "all", limit: int = TAG_FACETS_SHOWN
+) -> List[Dict[str, Any]]:
+	"""
+	Other tags carried by the posts of a tag archive, most common first.
+
+	Args:
+		tag_names (List[str]): Tags of the archive
+		mode (str): "all" for posts carrying every tag, "any" for any of them
+		limit (int): Maximum number of facets
+
+	Returns:
+		List[Dict[str, Any]]: Facets with name and count (posts of the archive
+			also carrying that tag)
+	"""
+	sync_cache_versions()
+	try:
+		index = get_tag_index()
+	except SQLAlchemyError as e:
+		print(f"Error building tag index: {str(e)}")
+		return []
+	return [
+		{"name": name, "count": count}
+		for name, count in index.facets(index.match(tag_names, mode), tag_names, limit)
+	]
+
+
+def get_tagged_posts_page(
+	tag_names: List[str], mode: str = "all", page: int = 1, limit: int = 10
+) -> Dict[str, Any]:
+	"""
+	Retrieve one page of the published posts carrying several tags, newest first.
+
+	Matching and ordering happen in the tag index; only the posts of the
+	requested page are loaded from the database.
+
+	Args:
+		tag_names (List[str]): Tags to combine
+		mode (str): "all" for posts carrying every tag, "any" for any of them
+		page (int): 1-based page number, clamped to total_pages
+		limit (int): Posts per page
+
+	Returns:
+		Dict[str, Any]: Same shape as get_published_posts_page() (next_cursor is
+			always None), plus facets as returned by get_tag_facets()
+	"""
+	sync_cache_versions()
+	result = {
+		"posts": [],
+		"total": 0,
+		"page": 1,
+		"total_pages": 1,
+		"next_cursor": None,
+		"facets": [],
+	}
+	try:
+		index = get_tag_index()
+	except SQLAlchemyError as e:
+		print(f"Error building tag index: {str(e)}")
+		return result
+
+	matched = index.match(tag_names, mode)
+	total_pages = max(1, (len(matched) + limit - 1) // limit)
+	page = min(max(1, page), total_pages)
+	post_ids = index.newest(matched, (page - 1) * limit, limit)
+	result.update(
+		total=len(matched),
+		page=page,
+		total_pages=total_pages,
+		facets=[
+			{"name": name, "count": count}
+			for name, count in index.facets(matched, tag_names, TAG_FACETS_SHOWN)
+		],
+	)
+	if not post_ids:
+		return result
+
+	db = db_manager.get_read_session()
+	try:
+		result["posts"] = _posts_by_ids(db, post_ids)
+	except SQLAlchemyError as e:
+		print(f"Error getting tagged posts: {str(e)}")
+	finally:
+		db.close()
+	return result
+
+
+@on_commit
+def _update_tag_index(changes):
+	"""Re-read the tags of the posts touched by a commit, directly or through a tag"""
+	index = _tag_index_state["index"]
+	if index is None:
+		return
+	post_ids = set(changes.get("posts", ()))
+	tag_ids = set(changes.get("tags", ()))
+	if not post_ids and not tag_ids:
+		return
+	known_names = _tag_index_state["tag_names"]
+	try:
+		with engine.connect() as conn:
+			if tag_ids:
+				# Renamed or deleted tags are found under their indexed names
+				old_names = [known_names[tag_id] for tag_id in tag_ids if tag_id in known_names]
+				post_ids.update(index.match(old_names, "any"))
+				post_ids.update(
+					conn.execute(
+						select(post_tags.c.post_id).where(post_tags.c.tag_id.in_(tag_ids))
+					).scalars()
+				)
+			post_ids.discard(None)
+			rows, tag_names = _tag_index_rows(conn, post_ids) if post_ids else ([], {})
+	except SQLAlchemyError as e:
+		print(f"Error updating tag index: {str(e)}")
+		_tag_index_state["index"] = None
+		return
+
+	for tag_id in tag_ids:
+		known_names.pop(tag_id, None)
+	known_names.update(tag_names)
+	found = set()
+	for post_id, tags, stamp in rows:
+		index.set_post(post_id, tags, stamp)
+		found.add(post_id)
+	for post_id in post_ids - found:
+		index.remove_post(post_id)
+
+
+@on_cache_invalidated("posts", "taxonomy")
+def _drop_tag_index(namespace):
+	"""Another worker changed posts or taxonomy: rebuild on next use"""
+	_tag_index_state["index"] = None
+
+
+# Content catalog
+# Opt-in (CONTENT_CATALOG=1) columnar read model of post metadata
+# (utils.catalog). Listings select, count and slice posts in the catalog and
+# only load the posts of the requested page. Built on first use, updated per
+# post on commit, and rebuilt after another worker's post or taxonomy writes.
+CONTENT_CATALOG = os.getenv("CONTENT_CATALOG", "").lower() in ("1", "true", "yes")
+
+_catalog_state: Dict[str, Any] = {"catalog": None}
+_catalog_lock = threading.Lock()
+
+
+def _catalog_rows(conn, post_ids=None) -> List[CatalogRow]:
+	"""Catalog rows of all posts, or of post_ids"""
+	posts = select(
+		Post.id,
+		Post.published_at,
+		Post.created_at,
+		Post.status,
+		Post.category_id,
+		Post.title,
+		Post.slug,
+	)
+	tags = select(post_tags.c.post_id, post_tags.c.tag_id)
+	if post_ids is not None:
+		posts = posts.where(Post.id.in_(post_ids))
+		tags = tags.where(post_tags.c.post_id.in_(post_ids))
+	tag_ids: Dict[int, List[int]] = {}
+	for post_id, tag_id in conn.execute(tags):
+		tag_ids.setdefault(post_id, []).append(tag_id)
+	return [
+		CatalogRow(
+			post_id,
+			to_stamp(published_at or created_at),
+			status or "draft",
+			category_id,
+			tuple(sorted(tag_ids.get(post_id, ()))),
+			title,
+			slug,
+		)
+		for post_id, published_at, created_at, status, category_id, title, slug in conn.execute(posts)
+	]
+
+
+def get_catalog() -> Catalog:
+	"""The content catalog, built on first use"""
+	catalog = _catalog_state["catalog"]
+	if catalog is None:
+		with _catalog_lock:
+			catalog = _catalog_state["catalog"]
+			if catalog is None:
+				with engine.connect() as conn:
+					catalog = Catalog.build(_catalog_rows(conn))
+				_catalog_state["catalog"] = catalog
+	return catalog
+
+
+def _listing_catalog() -> Optional[Catalog]:
+	"""The catalog when CONTENT_CATALOG is on and it can be built, else None"""
+	if not CONTENT_CATALOG:
+		return None
+	try:
+		return get_catalog()
+	except SQLAlchemyError as e:
+		print(f"Error building content catalog: {str(e)}")
+		return None
+
+
+def _catalog_posts_page(catalog, cursor, page, limit, category_id, tag_id) -> Dict[str, Any]:
+	"""get_published_posts_page() served from the catalog"""
+	page = max(1, page)
+	keyset = _decode_cursor(cursor) if cursor else None
+	before = (to_stamp(keyset[0]), keyset[1]) if keyset is not None else None
+	filters = {"status": "published", "category_id": category_id, "tag_id": tag_id}
+	offset = 0 if keyset is not None else (page - 1) * limit
+	total, post_ids = catalog.query(**filters, before=before, offset=offset, limit=limit + 1)
+	total_pages = max(1, (total + limit - 1) // limit)
+	if keyset is None and page > total_pages:
+		page = total_pages
+		total, post_ids = catalog.query(**filters, offset=(page - 1) * limit, limit=limit + 1)
+
+	result = {
+		"posts": [],
+		"total": total,
+		"page": page,
+		"total_pages": total_pages,
+		"next_cursor": None,
+	}
+	db = db_manager.get_read_session()
+	try:
+		result["posts"] = _posts_by_ids(db, post_ids[:limit])
+	except SQLAlchemyError as e:
+		print(f"Error getting posts page: {str(e)}")
+		return result
+	finally:
+		db.close()
+	if len(post_ids) > limit and result["posts"]:
+		last = catalog.get(post_ids[limit - 1])
+		sort_value = datetime.datetime(1970, 1, 1) + datetime.timedelta(microseconds=last.stamp)
+		result["next_cursor"] = _encode_keyset(sort_value, last.id)
+	return result
+
+
+def get_post_listing() -> List[Dict[str, Any]]:
+	"""
+	All posts (any status), newest first, as light dictionaries for the admin
+	dashboard: id, slug, title, status, category (id, name, slug or None).
+
+	Served from the content catalog when CONTENT_CATALOG is on, otherwise
+	from a column-only query; post content is never loaded.
+	"""
+	db = db_manager.get_read_session()
+	try:
+		categories = {
+			category_id: {"id": category_id, "name": name, "slug": slug}
+			for category_id, name, slug in db.query(Category.id, Category.name, Category.slug)
+		}
+		catalog = _listing_catalog()
+		if catalog is not None:
+			rows = [
+				(row.id, row.slug, row.title, row.status, row.category_id)
+				for row in catalog.rows(catalog.query()[1])
+			]
+		else:
+			rows = (
+				db.query(Post.id, Post.slug, Post.title, Post.status, Post.category_id)
+				.order_by(Post.published_at.desc(), Post.created_at.desc(), Post.id.desc())
+				.all()
+			)
+		return [
+			{
+				"id": post_id,
+				"slug": slug,
+				"title": title,
+				"status": status,
+				"category": categories.get(category_id),
+			}
+			for post_id, slug, title, status, category_id in rows
+		]
+	except SQLAlchemyError as e:
+		print(f"Error getting post listing: {str(e)}")
+		return []
+	finally:
+		db.close()
+
+
+@on_commit
+def _update_catalog(changes):
+	"""
+	Re-read the posts touched by a commit, directly or through a deleted tag.
+
+	Writers are serialized: each update rebuilds the column set from the
+	current one, so concurrent commits would otherwise drop each other's rows.
+	Readers never take the lock.
+	"""
+	with _catalog_lock:
+		catalog = _catalog_state["catalog"]
+		if catalog is None:
+			return
+		post_ids = set(changes.get("posts", ()))
+		for tag_id in changes.get("tags", ()):
+			if tag_id is not None:
+				post_ids.update(catalog.query(tag_id=tag_id)[1])
+		post_ids.discard(None)
+		if not post_ids:
+			return
+		try:
+			with engine.connect() as conn:
+				rows = _catalog_rows(conn, post_ids)
+		except SQLAlchemyError as e:
+			print(f"Error updating content catalog: {str(e)}")
+			_catalog_state["catalog"] = None
+			return
+		catalog.update(rows, removed_ids=post_ids)
+
+
+@on_cache_invalidated("posts", "taxonomy")
+def _drop_catalog(namespace):
+	"""Another worker changed posts or taxonomy: rebuild on next use"""
+	_catalog_state["catalog"] = None
+
+
+# Content snapshot
+# Opt-in (CONTENT_SNAPSHOT=1) binary snapshot of published post metadata
+# (utils.snapshot) that every worker maps read-only, so its memory is shared
+# instead of multiplied by the number of workers. The process handling a
+# write rewrites the file with the next generation number; the others map
+# the new file on their next listing. Takes precedence over CONTENT_CATALOG
+# for published listings.
+CONTENT_SNAPSHOT = os.getenv("CONTENT_SNAPSHOT", "").lower() in ("1", "true", "yes")
+CONTENT_SNAPSHOT_PATH = os.getenv(
+	"CONTENT_SNAPSHOT_PATH",
+	os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "content.snapshot"),
+)
+# Seconds between checks for a newer snapshot file (0 = on every listing)
+CONTENT_SNAPSHOT_CHECK_INTERVAL = float(os.getenv("CONTENT_SNAPSHOT_CHECK_INTERVAL", 0))
+
+_snapshot_file = SnapshotFile(CONTENT_SNAPSHOT_PATH, CONTENT_SNAPSHOT_CHECK_INTERVAL)
+
+
+def _snapshot_rows(conn, post_ids=None) -> List[SnapshotRow]:
+	"""Snapshot rows of all published posts, or of the published ones in post_ids"""
+	posts = select(
+		Post.id,
+		Post.published_at,
+		Post.created_at,
+		Post.category_id,
+		Post.slug,
+		Post.title,
+		Post.excerpt,
+	).where(Post.status == "published")
+	tags = select(post_tags.c.post_id, post_tags.c.tag_id)
+	if post_ids is not None:
+		posts = posts.where(Post.id.in_(post_ids))
+		tags = tags.where(post_tags.c.post_id.in_(post_ids))
+	tag_ids: Dict[int, List[int]] = {}
+	for post_id, tag_id in conn.execute(tags):
+		tag_ids.setdefault(post_id, []).append(tag_id)
+	return [
+		SnapshotRow(
+			post_id,
+			to_stamp(published_at or created_at),
+			category_id,
+			tuple(sorted(tag_ids.get(post_id, ()))),
+			slug,
+			title or "",
+			excerpt or "",
+		)
+		for post_id, published_at, created_at, category_id, slug, title, excerpt in conn.execute(posts)
+	]
+
+
+def _load_snapshot_rows() -> List[SnapshotRow]:
+	with engine.connect() as conn:
+		return _snapshot_rows(conn)
+
+
+def rebuild_content_snapshot() -> int:
+	"""Rewrite the content snapshot from the database, returning its generation"""
+	return _snapshot_file.rebuild(_load_snapshot_rows)
+
+
+def _published_catalog() -> Optional[Catalog]:
+	"""
+	Catalog of published posts for listings: backed by the shared snapshot
+	with CONTENT_SNAPSHOT, the in-memory catalog with CONTENT_CATALOG, else None.
+	"""
+	if not CONTENT_SNAPSHOT:
+		return _listing_catalog()
+	try:
+		snapshot = _snapshot_file.current()
+		if snapshot is None:
+			rebuild_content_snapshot()
+			snapshot = _snapshot_file.current()
+	except (OSError, SQLAlchemyError) as e:
+		print(f"Error loading content snapshot: {str(e)}")
+		return _listing_catalog()
+	return Catalog(columns=snapshot) if snapshot is not None else _listing_catalog()
+
+
+@on_commit
+def _update_content_snapshot(changes):
+	"""Write the next snapshot generation with the posts touched by a commit"""
+	if not CONTENT_SNAPSHOT:
+		return
+	post_ids = set(changes.get("posts", ()))
+	tag_ids = [tag_id for tag_id in changes.get("tags", ()) if tag_id is not None]
+	if tag_ids:
+		snapshot = _snapshot_file.current()
+		if snapshot is not None:
+			catalog = Catalog(columns=snapshot)
+			for tag_id in tag_ids:
+				post_ids.update(catalog.query(tag_id=tag_id)[1])
+	post_ids.discard(None)
+	if not post_ids:
+		return
+	def load_rows():
+		with engine.connect() as conn:
+			return _snapshot_rows(conn, post_ids)
+
+	try:
+		# Rows are read under the snapshot's write lock, after any concurrent
+		# writer's generation, so a stale read never lands in a newer file
+		_snapshot_file.update(load_rows, post_ids, load_all=_load_snapshot_rows)
+	except (OSError, SQLAlchemyError) as e:
+		print(f"Error updating content snapshot: {str(e)}")
+
+
 # Migration helper functions
+def explain_listing_queries() -> Dict[str, List[str]]:
+	"""
+	Run EXPLAIN for the queries behind the public listing routes.
+
+	Returns:
+		Dict[str, List[str]]: Query label mapped to the planner's output lines
+			(EXPLAIN QUERY PLAN on SQLite, EXPLAIN on MySQL)
+	"""
+	published = Post.status == "published"
+	queries = {
+		"home feed": select(Post.id)
+		.where(published)
+		.order_by(Post.published_at.desc(), Post.id.desc())
+		.limit(10),
+		"category archive": select(Post.id)
+		.where(Post.category_id == 1, published)
+		.order_by(Post.published_at.desc())
+		.limit(10),
+		"tag archive": select(Post.id)
+		.join(post_tags, post_tags.c.post_id == Post.id)
+		.where(post_tags.c.tag_id == 1, published)
+		.order_by(Post.published_at.desc())
+		.limit(10),
+		"tag counts": select(Tag.id, func.count(Post.id))
+		.outerjoin(post_tags, post_tags.c.tag_id == Tag.id)
+		.outerjoin(Post, (Post.id == post_tags.c.post_id) & published)
+		.group_by(Tag.id),
+		"media library": select(Media.id).order_by(Media.created_at.desc()).limit(20),
+	}
+	prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+
+	report = {}
+	with engine.connect() as conn:
+		for label, stmt in queries.items():
+			compiled = stmt.compile(dialect=engine.dialect)
+			params = compiled.construct_params()
+			if compiled.positional:
+				params = tuple(params[name] for name in compiled.positiontup)
+			rows = conn.exec_driver_sql(prefix + str(compiled), params).fetchall()
+			report[label] = [" | ".join(str(col) for col in row) for row in rows]
+	return report
+
+
+def migrate_indexes() -> List[str]:
+	"""
+	Add indexes declared on the models that are missing from an existing database.
+
+	Base.metadata.create_all() only creates missing tables, so databases created
+	before an index was declared never receive it. This inspects every mapped
+	table and creates the missing indexes in place. It also backfills
+	published_at from created_at for published posts that predate it (as
+	startup does), since published listings are ordered by that column.
+
+	Returns:
+		List[str]: Names of the indexes that were created
+	"""
+	created = []
+	inspector = inspect(engine)
+	for table in Base.metadata.sorted_tables:
+		if not inspector.has_table(table.name):
+			continue
+		existing = {index["name"] for index in inspector.get_indexes(table.name)}
+		for index in table.indexes:
+			if index.name not in existing:
+				index.create(bind=engine)
+				created.append(index.name)
+
+	db_manager.backfill_published_at()
+	return created
+
+
+def backfill_derived_fields(refresh_all: bool = False, batch_size: int = 200) -> Dict[str, int]:
+	"""
+	Store the derived fields (see set_derived_fields) of posts and pages
+	written before they existed.
+
+	Rows are updated through the ORM in batches, one commit per batch, so the
+	usual commit listeners refresh caches, indexes and snapshots.
+
+	Args:
+		refresh_all (bool): Recompute every row, not only those missing them
+		batch_size (int): Rows per commit
+
+	Returns:
+		Dict[str, int]: Table name mapped to the number of rows updated
+	"""
+	updated = {}
+	for model in (Post, Page):
+		updated[model.__tablename__] = 0
+		db = db_manager.get_session()
+		try:
+			query = db.query(model.id).order_by(model.id)
+			if not refresh_all:
+				query = query.filter(model.word_count.is_(None))
+			ids = [row[0] for row in query.all()]
+			for start in range(0, len(ids), batch_size):
+				rows = db.query(model).filter(model.id.in_(ids[start:start + batch_size]))
+				if model is Post:
+					rows = rows.options(undefer(Post.content))
+				for item in rows.all():
+					set_derived_fields(item)
+				db.commit()
+				updated[model.__tablename__] += len(ids[start:start + batch_size])
+		except SQLAlchemyError as e:
+			db.rollback()
+			print(f"Error backfilling derived fields: {str(e)}")
+		finally:
+			db.close()
+	return updated
+
+
 def migrate_from_json(json_file_path: str) -> bool:
 	"""Migrate data from JSON file to database"""
 	try:
@@ -1700,6 +4268,7 @@ def migrate_from_json(json_file_path: str) -> bool:
 					description=page_data.get("description", ""),
 					status=page_data.get("status", "published"),
 				)
+				set_derived_fields(page)
 				db.add(page)
 
 		# Migrate site settings
@@ -23,7 +23,11 @@ def truncate_text(text, length=200):
     return text[:length].rsplit(' ', 1)[0] + '...'
 
 def get_reading_time(content):
-    """Calculate estimated reading time"""
+    """Calculate estimated reading time (stored reading_time of a post/page dict if present)"""
+    if isinstance(content, dict):
+        if content.get('reading_time'):
+            return content['reading_time']
+        content = content.get('content')
     if not content:
         return 1
     words_per_minute = 200
@@ -32,7 +36,11 @@ def get_reading_time(content):
     return round(minutes) or 1
 
 def generate_excerpt(content):
-    """Generate post excerpt"""
+    """Generate post excerpt (stored plain_excerpt of a post/page dict if present)"""
+    if isinstance(content, dict):
+        if content.get('plain_excerpt'):
+            return content['plain_excerpt']
+        content = content.get('content')
     return truncate_text(content, 150)
 
 def process_page_data(page_data):
@@ -41,11 +49,15 @@ def process_page_data(page_data):
         return page_data
         
     processed = page_data.copy()
-    if 'content' in processed:
-        processed['excerpt'] = generate_excerpt(processed['content'])
-        processed['reading_time'] = get_reading_time(processed['content'])
+    # Prefer the fields stored when the post/page was saved
+    if processed.get('plain_excerpt') or 'content' in processed:
+        processed['excerpt'] = generate_excerpt(processed)
+    if processed.get('reading_time') or 'content' in processed:
+        processed['reading_time'] = get_reading_time(processed)
     if 'date' in processed:
         processed['formatted_date'] = format_date(processed['date'])
+    elif processed.get('publish_date'):
+        processed['formatted_date'] = format_date(processed['publish_date'])
     if 'last_modified' in processed:
         processed['formatted_last_modified'] = format_date(processed['last_modified'])
     return processed
\ No newline at end of file
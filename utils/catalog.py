@@ -0,0 +1,270 @@
+import sys
+import datetime
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+_MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+def to_stamp(value: Optional[datetime.datetime]) -> int:
+	"""Microseconds since the epoch of a naive UTC datetime (0 for None)"""
+	if value is None:
+		return 0
+	if value.tzinfo is not None:
+		value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+	return (value - _EPOCH) // _MICROSECOND
+
+
+class CatalogRow(NamedTuple):
+	"""One post as stored in the catalog"""
+	id: int
+	stamp: int
+	status: str
+	category_id: Optional[int]
+	tag_ids: Tuple[int, ...]
+	title: str
+	slug: str
+
+
+class _Columns:
+	"""
+	Immutable column set, sorted by (stamp, id) ascending.
+
+	Tags are stored CSR-style: the tags of row i are
+	tag_ids[tag_offsets[i]:tag_offsets[i + 1]], and tag_rows holds the row of
+	every tag entry so a tag filter is a single pass over tag_ids.
+	"""
+
+	def __init__(self, rows: List[CatalogRow]):
+		rows.sort(key=lambda row: (row.stamp, row.id))
+		self.statuses: List[str] = sorted({row.status for row in rows})
+		codes = {status: code for code, status in enumerate(self.statuses)}
+		self.ids = array("q", [row.id for row in rows])
+		self.stamps = array("q", [row.stamp for row in rows])
+		self.status_codes = array("b", [codes[row.status] for row in rows])
+		self.category_ids = array(
+			"q", [-1 if row.category_id is None else row.category_id for row in rows]
+		)
+		self.tag_offsets = array("I", [0])
+		self.tag_ids = array("q")
+		self.tag_rows = array("I")
+		for i, row in enumerate(rows):
+			self.tag_ids.extend(row.tag_ids)
+			self.tag_rows.extend([i] * len(row.tag_ids))
+			self.tag_offsets.append(len(self.tag_ids))
+		self.titles = [sys.intern(row.title or "") for row in rows]
+		self.slugs = [sys.intern(row.slug) for row in rows]
+		self.positions: Dict[int, int] = {row.id: i for i, row in enumerate(rows)}
+
+		# Zero-copy NumPy views; safe because the arrays are never resized
+		self.np = None
+		if np is not None:
+			self.np = {
+				"ids": np.frombuffer(self.ids, dtype=np.int64),
+				"stamps": np.frombuffer(self.stamps, dtype=np.int64),
+				"status_codes": np.frombuffer(self.status_codes, dtype=np.int8),
+				"category_ids": np.frombuffer(self.category_ids, dtype=np.int64),
+				"tag_ids": np.frombuffer(self.tag_ids, dtype=np.int64),
+				"tag_rows": np.frombuffer(self.tag_rows, dtype=np.uint32),
+			}
+
+	def __len__(self) -> int:
+		return len(self.ids)
+
+	def position(self, post_id: int) -> Optional[int]:
+		"""Row of post_id, or None"""
+		return self.positions.get(post_id)
+
+	def memory_usage(self) -> int:
+		"""Approximate bytes held by the columns"""
+		arrays = (
+			self.ids,
+			self.stamps,
+			self.status_codes,
+			self.category_ids,
+			self.tag_offsets,
+			self.tag_ids,
+			self.tag_rows,
+		)
+		size = sum(a.buffer_info()[1] * a.itemsize for a in arrays)
+		size += sum(sys.getsizeof(s) for s in self.titles + self.slugs)
+		return size + sys.getsizeof(self.positions)
+
+	def row(self, i: int) -> CatalogRow:
+		start, end = self.tag_offsets[i], self.tag_offsets[i + 1]
+		category_id = self.category_ids[i]
+		return CatalogRow(
+			self.ids[i],
+			self.stamps[i],
+			self.statuses[self.status_codes[i]],
+			None if category_id < 0 else category_id,
+			tuple(self.tag_ids[start:end]),
+			self.titles[i],
+			self.slugs[i],
+		)
+
+
+class Catalog:
+	"""
+	Columnar read model of post metadata for listings.
+
+	Ids, publish stamps, status codes, category ids and tag ids live in typed
+	arrays sorted by publish time; titles and slugs are interned strings.
+	Queries filter, count and slice these columns with vectorized NumPy
+	operations when NumPy is installed and with plain loops over the arrays
+	otherwise, and return post ids newest first. Updates replace the rows of
+	the changed posts and swap in a new column set, so readers never lock.
+	The columns can also come from a shared memory-mapped file (see
+	utils.snapshot), which provides the same attributes.
+
+	Usage:
+		catalog = Catalog.build([CatalogRow(1, to_stamp(now), "published", 2, (5,), "Hi", "hi")])
+		total, ids = catalog.query(status="published", tag_id=5, limit=10)
+	"""
+
+	def __init__(self, rows: Iterable[CatalogRow] = (), columns=None):
+		self._columns = columns if columns is not None else _Columns(list(rows))
+
+	@classmethod
+	def build(cls, rows: Iterable[CatalogRow]) -> "Catalog":
+		return cls(rows)
+
+	def __len__(self) -> int:
+		return len(self._columns)
+
+	@property
+	def vectorized(self) -> bool:
+		"""Whether queries run on NumPy"""
+		return self._columns.np is not None
+
+	def update(self, rows: Iterable[CatalogRow], removed_ids: Iterable[int] = ()):
+		"""
+		Insert or replace rows and drop removed_ids.
+
+		Readers need no lock, but concurrent updates must be serialized by the
+		caller: each one rebuilds the columns from the current set.
+		"""
+		rows = list(rows)
+		replaced = set(removed_ids) | {row.id for row in rows}
+		columns = self._columns
+		kept = [columns.row(i) for i in range(len(columns)) if columns.ids[i] not in replaced]
+		self._columns = _Columns(kept + rows)
+
+	def get(self, post_id: int) -> Optional[CatalogRow]:
+		columns = self._columns
+		i = columns.position(post_id)
+		return columns.row(i) if i is not None else None
+
+	def rows(self, post_ids: Sequence[int]) -> List[CatalogRow]:
+		"""Rows of post_ids, in the given order (unknown ids are skipped)"""
+		columns = self._columns
+		positions = [columns.position(post_id) for post_id in post_ids]
+		return [columns.row(i) for i in positions if i is not None]
+
+	def query(
+		self,
+		status: Optional[str] = None,
+		category_id: Optional[int] = None,
+		tag_id: Optional[int] = None,
+		since: Optional[int] = None,
+		until: Optional[int] = None,
+		before: Optional[Tuple[int, int]] = None,
+		offset: int = 0,
+		limit: Optional[int] = None,
+	) -> Tuple[int, List[int]]:
+		"""
+		Filter, count and slice posts, newest first.
+
+		Args:
+			status (str): Only posts with this status (optional)
+			category_id (int): Only posts in this category (optional)
+			tag_id (int): Only posts carrying this tag (optional)
+			since (int): Only posts stamped at or after this stamp (optional)
+			until (int): Only posts stamped before this stamp (optional)
+			before (Tuple[int, int]): Keyset (stamp, id); only posts older than
+				it are returned, it does not change the total (optional)
+			offset (int): Posts to skip
+			limit (int): Posts to return (all when None)
+
+		Returns:
+			Tuple[int, List[int]]: Number of posts matching the filters and the
+				requested post ids
+		"""
+		columns = self._columns
+		if status is not None and status not in columns.statuses:
+			return 0, []
+		status_code = columns.statuses.index(status) if status is not None else None
+		if columns.np is not None:
+			return self._query_numpy(
+				columns, status_code, category_id, tag_id, since, until, before, offset, limit
+			)
+		return self._query_arrays(
+			columns, status_code, category_id, tag_id, since, until, before, offset, limit
+		)
+
+	@staticmethod
+	def _query_numpy(columns, status_code, category_id, tag_id, since, until, before, offset, limit):
+		c = columns.np
+		mask = np.ones(len(columns), dtype=bool)
+		if status_code is not None:
+			mask &= c["status_codes"] == status_code
+		if category_id is not None:
+			mask &= c["category_ids"] == category_id
+		if tag_id is not None:
+			tagged = np.zeros(len(columns), dtype=bool)
+			tagged[c["tag_rows"][c["tag_ids"] == tag_id]] = True
+			mask &= tagged
+		if since is not None:
+			mask &= c["stamps"] >= since
+		if until is not None:
+			mask &= c["stamps"] < until
+		total = int(np.count_nonzero(mask))
+		if before is not None:
+			stamp, post_id = before
+			mask &= (c["stamps"] < stamp) | ((c["stamps"] == stamp) & (c["ids"] < post_id))
+		rows = np.flatnonzero(mask)[::-1]
+		end = None if limit is None else offset + limit
+		return total, c["ids"][rows[offset:end]].tolist()
+
+	@staticmethod
+	def _query_arrays(columns, status_code, category_id, tag_id, since, until, before, offset, limit):
+		tagged = None
+		if tag_id is not None:
+			tag_rows = columns.tag_rows
+			tagged = {tag_rows[i] for i, entry in enumerate(columns.tag_ids) if entry == tag_id}
+		ids, stamps = columns.ids, columns.stamps
+		status_codes, category_ids = columns.status_codes, columns.category_ids
+		total = 0
+		skipped = 0
+		page: List[int] = []
+		for i in range(len(columns) - 1, -1, -1):
+			if status_code is not None and status_codes[i] != status_code:
+				continue
+			if category_id is not None and category_ids[i] != category_id:
+				continue
+			if tagged is not None and i not in tagged:
+				continue
+			stamp = stamps[i]
+			if since is not None and stamp < since:
+				continue
+			if until is not None and stamp >= until:
+				continue
+			total += 1
+			if before is not None and (stamp, ids[i]) >= before:
+				continue
+			if skipped < offset:
+				skipped += 1
+			elif limit is None or len(page) < limit:
+				page.append(ids[i])
+		return total, page
+
+	def memory_usage(self) -> int:
+		"""Approximate bytes held by this process for the columns"""
+		return self._columns.memory_usage()
@@ -0,0 +1,112 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+
+class CachedPage(NamedTuple):
+	"""A rendered response body with what is needed to replay it"""
+	body: bytes
+	status: int
+	headers: List[Tuple[str, str]]
+
+
+class PageCache:
+	"""
+	In-process LRU cache of rendered pages, bounded by total body size.
+
+	Every entry carries a set of tags (e.g. "posts", "page:about"). Writers call
+	invalidate() with the tags they affect, which drops exactly the entries
+	carrying one of those tags. A generation counter guards against a render
+	that started before an invalidation storing its now-stale result.
+
+	Usage:
+		cache = PageCache(max_bytes=64 * 1024 * 1024)
+		generation = cache.generation
+		page = cache.get("/post/hello")
+		if page is None:
+			body = render()
+			cache.set("/post/hello", CachedPage(body, 200, []), {"posts"}, generation)
+		cache.invalidate({"posts"})
+	"""
+
+	def __init__(self, max_bytes: int):
+		self.max_bytes = max_bytes
+		self.generation = 0
+		self.hits = 0
+		self.misses = 0
+		self._entries: "OrderedDict[str, Tuple[CachedPage, Set[str]]]" = OrderedDict()
+		self._keys_by_tag: Dict[str, Set[str]] = {}
+		self._size = 0
+		self._lock = threading.Lock()
+
+	def get(self, key: str) -> Optional[CachedPage]:
+		"""Return the cached page for key and mark it most recently used"""
+		with self._lock:
+			entry = self._entries.get(key)
+			if entry is None:
+				self.misses += 1
+				return None
+			self._entries.move_to_end(key)
+			self.hits += 1
+			return entry[0]
+
+	def set(self, key: str, page: CachedPage, tags: Iterable[str], generation: int) -> bool:
+		"""
+		Store page under key unless an invalidation happened since generation
+		was read or the page alone exceeds the size bound.
+		"""
+		size = len(page.body)
+		if size > self.max_bytes:
+			return False
+		with self._lock:
+			if generation != self.generation:
+				return False
+			self._remove(key)
+			tags = set(tags)
+			self._entries[key] = (page, tags)
+			for tag in tags:
+				self._keys_by_tag.setdefault(tag, set()).add(key)
+			self._size += size
+			while self._size > self.max_bytes:
+				self._remove(next(iter(self._entries)))
+			return True
+
+	def invalidate(self, tags: Iterable[str]):
+		"""Drop every entry carrying any of the given tags"""
+		with self._lock:
+			self.generation += 1
+			for tag in tags:
+				for key in list(self._keys_by_tag.get(tag, ())):
+					self._remove(key)
+
+	def clear(self):
+		"""Drop every entry"""
+		with self._lock:
+			self.generation += 1
+			self._entries.clear()
+			self._keys_by_tag.clear()
+			self._size = 0
+
+	def stats(self) -> Dict[str, int]:
+		"""Entry count, byte size and hit/miss counters"""
+		with self._lock:
+			return {
+				"entries": len(self._entries),
+				"bytes": self._size,
+				"max_bytes": self.max_bytes,
+				"hits": self.hits,
+				"misses": self.misses,
+			}
+
+	def _remove(self, key: str):
+		entry = self._entries.pop(key, None)
+		if entry is None:
+			return
+		page, tags = entry
+		self._size -= len(page.body)
+		for tag in tags:
+			keys = self._keys_by_tag.get(tag)
+			if keys is not None:
+				keys.discard(key)
+				if not keys:
+					del self._keys_by_tag[tag]
@@ -0,0 +1,298 @@
+import os
+import re
+import math
+import heapq
+import pickle
+import threading
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+_TOKEN_RE = re.compile(r"\w+")
+SNAPSHOT_FORMAT = 1
+
+
+def tokenize(text: str) -> List[str]:
+	"""Lower-cased word tokens of text (tokens over 40 characters are dropped)"""
+	if not text:
+		return []
+	return [token for token in _TOKEN_RE.findall(text.lower()) if len(token) <= 40]
+
+
+class SearchIndex:
+	"""
+	In-memory inverted index with BM25 ranking.
+
+	Documents are identified by string keys (e.g. "post:12") and made of named
+	text fields; tokens of weightier fields (title, tags) count several times.
+	Each term maps to two parallel array('I') postings: internal document
+	numbers, always increasing, and term frequencies. Updating a document
+	appends it under a new number and leaves a tombstone for the old one;
+	tombstoned entries are skipped when scoring and dropped by compact(),
+	which runs once they make up a quarter of the index.
+
+	Usage:
+		index = SearchIndex()
+		index.add("post:1", {"title": "Hello", "body": "Hello world"}, stamp=1700000000.0)
+		total, hits = index.search("hel", limit=10)  # [("post:1", 1.27)]
+		index.save("instance/search_index.pickle", {"built_at": ...})
+	"""
+
+	FIELD_WEIGHTS = {"title": 3, "tags": 2, "excerpt": 2, "body": 1}
+	MAX_PREFIX_EXPANSIONS = 64
+
+	def __init__(self, k1: float = 1.2, b: float = 0.75):
+		self.k1 = k1
+		self.b = b
+		self._postings: Dict[str, Tuple[array, array]] = {}
+		self._keys: List[Optional[str]] = []
+		self._doc_numbers: Dict[str, int] = {}
+		self._lengths = array("I")
+		self._stamps: Dict[str, float] = {}
+		self._total_length = 0
+		self._deleted = 0
+		self._vocabulary: Optional[List[str]] = None
+		# BM25 length normalisation per document, recomputed after changes
+		self._norms: Optional[array] = None
+		self._lock = threading.RLock()
+
+	def __len__(self) -> int:
+		return len(self._doc_numbers)
+
+	def __contains__(self, key: str) -> bool:
+		return key in self._doc_numbers
+
+	def stamps(self) -> Dict[str, float]:
+		"""Copy of the key -> stamp map (e.g. source updated_at timestamps)"""
+		with self._lock:
+			return dict(self._stamps)
+
+	def add(self, key: str, fields: Dict[str, str], stamp: float = 0.0):
+		"""Index (or re-index) a document"""
+		counts: Counter = Counter()
+		for field, text in fields.items():
+			weight = self.FIELD_WEIGHTS.get(field, 1)
+			for token, count in Counter(tokenize(text)).items():
+				counts[token] += count * weight
+
+		with self._lock:
+			self._remove(key)
+			doc = len(self._keys)
+			self._keys.append(key)
+			self._doc_numbers[key] = doc
+			self._stamps[key] = stamp
+			length = sum(counts.values())
+			self._lengths.append(length)
+			self._total_length += length
+			self._norms = None
+			for term, frequency in counts.items():
+				postings = self._postings.get(term)
+				if postings is None:
+					postings = self._postings[term] = (array("I"), array("I"))
+					self._vocabulary = None
+				postings[0].append(doc)
+				postings[1].append(frequency)
+
+	def remove(self, key: str):
+		"""Drop a document from the index (no-op if absent)"""
+		with self._lock:
+			self._remove(key)
+			if self._deleted > 1000 and self._deleted * 4 > len(self._keys):
+				self.compact()
+
+	def _remove(self, key: str):
+		doc = self._doc_numbers.pop(key, None)
+		if doc is None:
+			return
+		self._stamps.pop(key, None)
+		self._keys[doc] = None
+		self._total_length -= self._lengths[doc]
+		self._lengths[doc] = 0
+		self._deleted += 1
+		self._norms = None
+
+	def compact(self):
+		"""Renumber live documents and drop tombstoned postings"""
+		with self._lock:
+			renumbered = array("i", [-1]) * len(self._keys)
+			keys: List[Optional[str]] = []
+			lengths = array("I")
+			for doc, key in enumerate(self._keys):
+				if key is not None:
+					renumbered[doc] = len(keys)
+					keys.append(key)
+					lengths.append(self._lengths[doc])
+
+			postings = {}
+			for term, (docs, frequencies) in self._postings.items():
+				new_docs, new_frequencies = array("I"), array("I")
+				for doc, frequency in zip(docs, frequencies):
+					new_doc = renumbered[doc]
+					if new_doc >= 0:
+						new_docs.append(new_doc)
+						new_frequencies.append(frequency)
+				if new_docs:
+					postings[term] = (new_docs, new_frequencies)
+
+			self._postings = postings
+			self._keys = keys
+			self._lengths = lengths
+			self._doc_numbers = {key: doc for doc, key in enumerate(keys)}
+			self._deleted = 0
+			self._vocabulary = None
+			self._norms = None
+
+	def _expand(self, prefix: str) -> List[str]:
+		"""Indexed terms starting with prefix (bounded)"""
+		if self._vocabulary is None:
+			self._vocabulary = sorted(self._postings)
+		vocabulary = self._vocabulary
+		terms = []
+		i = bisect_left(vocabulary, prefix)
+		while i < len(vocabulary) and vocabulary[i].startswith(prefix):
+			terms.append(vocabulary[i])
+			if len(terms) >= self.MAX_PREFIX_EXPANSIONS:
+				break
+			i += 1
+		return terms
+
+	def search(
+		self,
+		query: str,
+		limit: int = 10,
+		offset: int = 0,
+		prefix: bool = True,
+		kind: Optional[str] = None,
+	) -> Tuple[int, List[Tuple[str, float]]]:
+		"""
+		Rank documents containing every query word by BM25.
+
+		Args:
+			query (str): Search text
+			limit (int): Hits to return
+			offset (int): Hits to skip
+			prefix (bool): Match the last word as a prefix
+			kind (str): Only documents whose key starts with "<kind>:" (optional)
+
+		Returns:
+			Tuple[int, List[Tuple[str, float]]]: Number of matching documents and
+				the requested (key, score) hits, best first
+		"""
+		terms = list(dict.fromkeys(tokenize(query)))[:16]
+		if not terms:
+			return 0, []
+
+		with self._lock:
+			live = len(self._doc_numbers)
+			if not live:
+				return 0, []
+			if self._norms is None:
+				k1, b = self.k1, self.b
+				average_length = self._total_length / live or 1.0
+				self._norms = array(
+					"d", [k1 * (1 - b + b * length / average_length) for length in self._lengths]
+				)
+			norms = self._norms
+			boost = self.k1 + 1
+			keys = self._keys
+
+			groups = []
+			for i, term in enumerate(terms):
+				if prefix and i == len(terms) - 1:
+					expansions = self._expand(term)
+				else:
+					expansions = [term] if term in self._postings else []
+				if not expansions:
+					return 0, []
+				groups.append([self._postings[t] for t in expansions])
+			# Rarest words first, so the candidate set starts small
+			groups.sort(key=lambda group: sum(len(docs) for docs, _ in group))
+
+			scores: Optional[Dict[int, float]] = None
+			for group in groups:
+				group_scores: Dict[int, float] = {}
+				for docs, frequencies in group:
+					df = min(len(docs), live)
+					idf = math.log(1 + (live - df + 0.5) / (df + 0.5))
+					if scores is None:
+						for doc, frequency in zip(docs, frequencies):
+							if keys[doc] is not None:
+								score = idf * frequency * boost / (frequency + norms[doc])
+								group_scores[doc] = group_scores.get(doc, 0.0) + score
+					elif len(scores) * 16 < len(docs):
+						# Few candidates left: probe the postings instead of scanning them
+						for doc in scores:
+							i = bisect_left(docs, doc)
+							if i < len(docs) and docs[i] == doc:
+								frequency = frequencies[i]
+								score = idf * frequency * boost / (frequency + norms[doc])
+								group_scores[doc] = group_scores.get(doc, 0.0) + score
+					else:
+						for doc, frequency in zip(docs, frequencies):
+							if doc in scores:
+								score = idf * frequency * boost / (frequency + norms[doc])
+								group_scores[doc] = group_scores.get(doc, 0.0) + score
+				if scores is not None:
+					for doc in group_scores:
+						group_scores[doc] += scores[doc]
+				scores = group_scores
+				if not scores:
+					return 0, []
+
+			if kind is not None:
+				key_prefix = f"{kind}:"
+				scores = {doc: s for doc, s in scores.items() if keys[doc].startswith(key_prefix)}
+			best = heapq.nlargest(offset + limit, scores.items(), key=lambda item: item[1])
+			return len(scores), [(keys[doc], score) for doc, score in best[offset:]]
+
+	def save(self, path: str, meta: Optional[Dict[str, Any]] = None):
+		"""Write a snapshot atomically (temporary file, then os.replace)"""
+		with self._lock:
+			state = {
+				"format": SNAPSHOT_FORMAT,
+				"meta": meta or {},
+				"k1": self.k1,
+				"b": self.b,
+				"postings": self._postings,
+				"keys": self._keys,
+				"lengths": self._lengths,
+				"stamps": self._stamps,
+				"total_length": self._total_length,
+				"deleted": self._deleted,
+			}
+			os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+			tmp_path = f"{path}.{os.getpid()}.tmp"
+			with open(tmp_path, "wb") as f:
+				pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+		os.replace(tmp_path, path)
+
+	@classmethod
+	def load(cls, path: str) -> Optional[Tuple["SearchIndex", Dict[str, Any]]]:
+		"""Read a snapshot written by save(); None if missing or unreadable"""
+		try:
+			with open(path, "rb") as f:
+				state = pickle.load(f)
+		except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+			return None
+		if not isinstance(state, dict) or state.get("format") != SNAPSHOT_FORMAT:
+			return None
+
+		index = cls(state["k1"], state["b"])
+		index._postings = state["postings"]
+		index._keys = state["keys"]
+		index._lengths = state["lengths"]
+		index._stamps = state["stamps"]
+		index._total_length = state["total_length"]
+		index._deleted = state["deleted"]
+		index._doc_numbers = {key: doc for doc, key in enumerate(index._keys) if key is not None}
+		return index, state["meta"]
+
+
+def build_index(documents: Iterable[Tuple[str, Dict[str, str], float]]) -> SearchIndex:
+	"""Build an index from (key, fields, stamp) tuples"""
+	index = SearchIndex()
+	for key, fields, stamp in documents:
+		index.add(key, fields, stamp)
+	return index
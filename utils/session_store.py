@@ -0,0 +1,290 @@
+import os
+import re
+import time
+import secrets
+import datetime
+import tempfile
+from typing import Optional
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SecureCookieSession, SessionInterface
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+
+# Session ids are secrets.token_urlsafe() output; anything else is ignored
+_SESSION_ID_RE = re.compile(r"^[A-Za-z0-9_-]{32,64}$")
+
+
+def load_secret_key(key_file: str) -> str:
+	"""
+	Read the signing secret from key_file, generating it on first use.
+
+	Every worker and every node sharing key_file signs sessions with the same
+	key. The key is written to a temporary file (mode 0600) and hard-linked
+	into place, so concurrent workers never see a partial key: the first link
+	wins and the others read the winner's key.
+	"""
+	if not os.path.exists(key_file):
+		key_dir = os.path.dirname(os.path.abspath(key_file))
+		os.makedirs(key_dir, exist_ok=True)
+		fd, tmp_path = tempfile.mkstemp(dir=key_dir, prefix=".secret-")
+		try:
+			with os.fdopen(fd, "w") as f:
+				f.write(secrets.token_hex(32))
+			try:
+				os.link(tmp_path, key_file)
+			except FileExistsError:
+				pass
+		finally:
+			os.unlink(tmp_path)
+
+	with open(key_file) as f:
+		return f.read().strip()
+
+
+class ServerSideSession(SecureCookieSession):
+	"""Session data kept on the server; only its id travels in the cookie"""
+
+	def __init__(self, initial=None, sid: Optional[str] = None, new: bool = False):
+		super().__init__(initial)
+		self.sid = sid or secrets.token_urlsafe(32)
+		self.new = new
+		# Stored id replaced by regenerate(), deleted when the session is saved
+		self.previous_sid: Optional[str] = None
+
+	def regenerate(self):
+		"""
+		Move the session data to a new random id.
+
+		Called whenever the session gains privileges (login, pending 2FA), so a
+		session id planted by an attacker before login is never authenticated.
+		"""
+		if not self.new and self.previous_sid is None:
+			self.previous_sid = self.sid
+		self.sid = secrets.token_urlsafe(32)
+		self.modified = True
+
+
+class DatabaseSessionStore:
+	"""
+	Sessions stored in a database table (see data_store.ServerSession).
+
+	Uses Core statements on its own connections, so session saves never go
+	through the ORM change tracking that drives cache invalidation.
+	"""
+
+	def __init__(self, engine, table):
+		self.engine = engine
+		self.table = table
+
+	def load(self, sid: str) -> Optional[str]:
+		with self.engine.connect() as conn:
+			return conn.execute(
+				select(self.table.c.data).where(
+					self.table.c.session_id == sid,
+					self.table.c.expires_at > datetime.datetime.utcnow(),
+				)
+			).scalar()
+
+	def save(self, sid: str, data: str, expires_at: datetime.datetime):
+		values = {"data": data, "expires_at": expires_at}
+		with self.engine.begin() as conn:
+			updated = conn.execute(
+				update(self.table).where(self.table.c.session_id == sid).values(**values)
+			)
+			if updated.rowcount:
+				return
+		try:
+			with self.engine.begin() as conn:
+				conn.execute(insert(self.table).values(session_id=sid, **values))
+		except IntegrityError:
+			# Inserted by a concurrent request of the same client
+			with self.engine.begin() as conn:
+				conn.execute(
+					update(self.table).where(self.table.c.session_id == sid).values(**values)
+				)
+
+	def delete(self, sid: str):
+		with self.engine.begin() as conn:
+			conn.execute(delete(self.table).where(self.table.c.session_id == sid))
+
+	def sweep(self) -> int:
+		"""Delete expired sessions, returning how many were removed"""
+		with self.engine.begin() as conn:
+			return conn.execute(
+				delete(self.table).where(self.table.c.expires_at <= datetime.datetime.utcnow())
+			).rowcount
+
+
+class FilesystemSessionStore:
+	"""
+	Sessions stored as one file per session id in a shared directory.
+
+	A file's modification time is set to the session's expiry, so expiry
+	checks and sweeping only need a stat.
+	"""
+
+	def __init__(self, directory: str):
+		self.directory = directory
+		os.makedirs(directory, mode=0o700, exist_ok=True)
+
+	def _path(self, sid: str) -> str:
+		return os.path.join(self.directory, sid)
+
+	def load(self, sid: str) -> Optional[str]:
+		path = self._path(sid)
+		try:
+			if os.stat(path).st_mtime <= time.time():
+				return None
+			with open(path, encoding="utf-8") as f:
+				return f.read()
+		except OSError:
+			return None
+
+	def save(self, sid: str, data: str, expires_at: datetime.datetime):
+		fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+		try:
+			with os.fdopen(fd, "w", encoding="utf-8") as f:
+				f.write(data)
+			expires = expires_at.replace(tzinfo=datetime.timezone.utc).timestamp()
+			os.utime(tmp_path, (expires, expires))
+			os.replace(tmp_path, self._path(sid))
+		except OSError:
+			if os.path.exists(tmp_path):
+				os.unlink(tmp_path)
+			raise
+
+	def delete(self, sid: str):
+		try:
+			os.unlink(self._path(sid))
+		except FileNotFoundError:
+			pass
+
+	def sweep(self) -> int:
+		"""Delete expired session files, returning how many were removed"""
+		removed = 0
+		now = time.time()
+		with os.scandir(self.directory) as entries:
+			for entry in entries:
+				if entry.name.startswith(".") or not _SESSION_ID_RE.match(entry.name):
+					continue
+				try:
+					if entry.stat().st_mtime <= now:
+						os.unlink(entry.path)
+						removed += 1
+				except OSError:
+					continue
+		return removed
+
+
+class ServerSideSessionInterface(SessionInterface):
+	"""
+	Flask session interface keeping session data in a shared store.
+
+	The cookie only carries a random session id, so any worker on any node
+	with access to the store can serve the session. Sessions expire after
+	PERMANENT_SESSION_LIFETIME on the server whether or not they are
+	permanent, and expired ones are swept at most once per sweep_interval
+	seconds per process.
+
+	Usage:
+		store = FilesystemSessionStore("/var/lib/cms/sessions")
+		app.session_interface = ServerSideSessionInterface(store)
+	"""
+
+	serializer = TaggedJSONSerializer()
+
+	def __init__(self, store, sweep_interval: float = 3600):
+		self.store = store
+		self.sweep_interval = sweep_interval
+		self._next_sweep = 0.0
+
+	def open_session(self, app, request) -> ServerSideSession:
+		sid = request.cookies.get(self.get_cookie_name(app))
+		if sid and _SESSION_ID_RE.match(sid):
+			try:
+				data = self.store.load(sid)
+			except Exception as e:
+				print(f"Error loading session: {str(e)}")
+				data = None
+			if data is not None:
+				try:
+					return ServerSideSession(self.serializer.loads(data), sid=sid)
+				except ValueError:
+					pass
+		return ServerSideSession(new=True)
+
+	def save_session(self, app, session: ServerSideSession, response):
+		name = self.get_cookie_name(app)
+		domain = self.get_cookie_domain(app)
+		path = self.get_cookie_path(app)
+		secure = self.get_cookie_secure(app)
+		partitioned = self.get_cookie_partitioned(app)
+		samesite = self.get_cookie_samesite(app)
+		httponly = self.get_cookie_httponly(app)
+
+		if session.accessed:
+			response.vary.add("Cookie")
+
+		if session.previous_sid is not None:
+			self.store.delete(session.previous_sid)
+
+		if not session:
+			if session.modified and not session.new:
+				self.store.delete(session.sid)
+				response.delete_cookie(
+					name,
+					domain=domain,
+					path=path,
+					secure=secure,
+					partitioned=partitioned,
+					samesite=samesite,
+					httponly=httponly,
+				)
+			return
+
+		if session.modified or self.should_set_cookie(app, session):
+			expires_at = datetime.datetime.utcnow() + app.permanent_session_lifetime
+			self.store.save(session.sid, self.serializer.dumps(dict(session)), expires_at)
+			response.set_cookie(
+				name,
+				session.sid,
+				expires=self.get_expiration_time(app, session),
+				httponly=httponly,
+				domain=domain,
+				path=path,
+				secure=secure,
+				partitioned=partitioned,
+				samesite=samesite,
+			)
+			self._maybe_sweep()
+
+	def _maybe_sweep(self):
+		now = time.monotonic()
+		if now < self._next_sweep:
+			return
+		self._next_sweep = now + self.sweep_interval
+		try:
+			self.store.sweep()
+		except Exception as e:
+			print(f"Error sweeping sessions: {str(e)}")
+
+
+def create_session_interface(
+	backend: str, engine=None, table=None, directory: str = None, sweep_interval: float = 3600
+) -> Optional[ServerSideSessionInterface]:
+	"""
+	Build the session interface for a SESSION_BACKEND value.
+
+	Returns None for "cookie" (Flask's signed cookie sessions).
+	"""
+	if backend == "cookie":
+		return None
+	if backend == "database":
+		store = DatabaseSessionStore(engine, table)
+	elif backend == "filesystem":
+		store = FilesystemSessionStore(directory)
+	else:
+		raise ValueError(f"Unknown session backend: {backend}")
+	return ServerSideSessionInterface(store, sweep_interval)
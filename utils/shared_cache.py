@@ -0,0 +1,345 @@
+import os
+import json
+import mmap
+import struct
+import hashlib
+import threading
+import contextlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+	import fcntl
+except ImportError:
+	fcntl = None
+
+from utils.page_cache import CachedPage
+
+
+MAGIC = b"CMSSHC\0\0"
+CACHE_FORMAT = 1
+# magic, format, slot count, slot data bytes, generation, hits, misses, evictions, clock hand
+_HEADER = struct.Struct("<8sIIQQQQQQ")
+# seq, used, ref, blob length, key hash
+_SLOT = struct.Struct("<IIIIQ")
+_SLOT_HEADER_SIZE = 32
+_SEQ = struct.Struct("<I")
+_COUNTER = struct.Struct("<Q")
+# Tag versions live in a fixed table indexed by tag hash; two tags sharing a
+# cell only cause extra invalidations
+TAG_CELLS = 4096
+# A key may live in any of the PROBE_WINDOW slots following its home slot
+PROBE_WINDOW = 8
+
+_GENERATION_OFFSET = 24
+_HITS_OFFSET = 32
+_MISSES_OFFSET = 40
+_EVICTIONS_OFFSET = 48
+_CLOCK_OFFSET = 56
+
+
+def _hash(value: str) -> int:
+	return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class SharedCache:
+	"""
+	Fixed-size cache of byte blobs shared by every process on a host.
+
+	The cache is a file mapped with mmap: a header, a table of tag versions and
+	slot_count slots of slot_size bytes each. A key hashes to a home slot and
+	may be stored in any of the PROBE_WINDOW slots after it (bounded open
+	addressing), so lookups read at most PROBE_WINDOW slots. When all of them
+	are taken, the CLOCK policy evicts the first slot not referenced since the
+	hand last passed it.
+
+	Readers take no lock: every slot carries a sequence number that writers
+	make odd while they change the slot (a seqlock), and readers retry or
+	miss if it moved under them. Writers are serialized by a threading lock
+	and an flock on a lock file each process opens itself (flock locks belong
+	to the open file, which forked workers would otherwise share).
+
+	Entries carry tags. invalidate() bumps the shared version of each tag, and
+	entries stored under an older version are treated as missing in every
+	process. Hit, miss and eviction counters are shared but updated without
+	the lock, so they are approximate. The file is reinitialized when its
+	geometry does not match, so stop all workers before changing sizes.
+
+	Usage:
+		cache = SharedCache("instance/cache.bin", slot_count=1024, slot_size=64 * 1024)
+		cache.set("/post/hello", body, tags=["posts"])
+		cache.get("/post/hello")  # body, from any worker
+		cache.invalidate(["posts"])
+	"""
+
+	def __init__(self, path: str, slot_count: int = 1024, slot_size: int = 64 * 1024):
+		self.path = path
+		self.slot_count = slot_count
+		self.slot_size = slot_size
+		self._stride = _SLOT_HEADER_SIZE + slot_size
+		self._tags_offset = _HEADER.size
+		self._slots_offset = self._tags_offset + TAG_CELLS * _COUNTER.size
+		self._size = self._slots_offset + slot_count * self._stride
+		self._lock = threading.Lock()
+		# Lock file and the process that opened it (see _locked)
+		self._lock_file = None
+		self._lock_pid = None
+
+		os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+		fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+		self._file = os.fdopen(fd, "r+b")
+		with self._locked():
+			if not self._valid_header():
+				self._file.truncate(0)
+				self._file.truncate(self._size)
+				self._file.seek(0)
+				self._file.write(_HEADER.pack(MAGIC, CACHE_FORMAT, slot_count, slot_size, 0, 0, 0, 0, 0))
+				self._file.flush()
+		self._mmap = mmap.mmap(self._file.fileno(), self._size)
+
+	def _valid_header(self) -> bool:
+		self._file.seek(0)
+		data = self._file.read(_HEADER.size)
+		if len(data) < _HEADER.size or os.fstat(self._file.fileno()).st_size != self._size:
+			return False
+		magic, fmt, slot_count, slot_size = _HEADER.unpack(data)[:4]
+		return (magic, fmt, slot_count, slot_size) == (
+			MAGIC,
+			CACHE_FORMAT,
+			self.slot_count,
+			self.slot_size,
+		)
+
+	@contextlib.contextmanager
+	def _locked(self):
+		"""Serialize writers across threads and processes (no flock without fcntl)"""
+		with self._lock:
+			if fcntl is None:
+				yield
+				return
+			if self._lock_pid != os.getpid():
+				# First write in this process (e.g. a worker forked after the
+				# cache was created): open its own file description to lock
+				self._lock_file = open(f"{self.path}.lock", "a")
+				self._lock_pid = os.getpid()
+			fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+			try:
+				yield
+			finally:
+				fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+	@property
+	def generation(self) -> int:
+		"""Shared counter bumped by every invalidation"""
+		return _COUNTER.unpack_from(self._mmap, _GENERATION_OFFSET)[0]
+
+	def _bump(self, offset: int):
+		value = _COUNTER.unpack_from(self._mmap, offset)[0]
+		_COUNTER.pack_into(self._mmap, offset, value + 1)
+
+	def _tag_cell(self, tag: str) -> int:
+		return self._tags_offset + (_hash(tag) % TAG_CELLS) * _COUNTER.size
+
+	def _tag_version(self, cell: int) -> int:
+		return _COUNTER.unpack_from(self._mmap, cell)[0]
+
+	def _window(self, key_hash: int) -> List[int]:
+		home = key_hash % self.slot_count
+		return [
+			self._slots_offset + ((home + i) % self.slot_count) * self._stride
+			for i in range(min(PROBE_WINDOW, self.slot_count))
+		]
+
+	def _decode(self, blob: bytes) -> Tuple[str, List[Tuple[int, int]], bytes]:
+		"""Split a slot blob into key, (tag cell, version) pairs and value"""
+		key_length, tag_count = struct.unpack_from("<II", blob, 0)
+		offset = 8
+		key = blob[offset:offset + key_length].decode("utf-8")
+		offset += key_length
+		tags = [struct.unpack_from("<QQ", blob, offset + i * 16) for i in range(tag_count)]
+		offset += tag_count * 16
+		return key, tags, blob[offset:]
+
+	def _current(self, tags: List[Tuple[int, int]]) -> bool:
+		return all(self._tag_version(cell) == version for cell, version in tags)
+
+	def _read_slot(self, slot: int, key_hash: int) -> Optional[bytes]:
+		"""The blob of a slot holding key_hash, or None (seqlock-consistent)"""
+		mapping = self._mmap
+		for _ in range(3):
+			seq, used, _, length, slot_hash = _SLOT.unpack_from(mapping, slot)
+			if seq & 1:
+				continue
+			if not used or slot_hash != key_hash:
+				return None
+			start = slot + _SLOT_HEADER_SIZE
+			blob = mapping[start:start + length]
+			if _SEQ.unpack_from(mapping, slot)[0] == seq:
+				return blob
+		return None
+
+	def get(self, key: str) -> Optional[bytes]:
+		"""The value stored under key, unless missing or invalidated"""
+		key_hash = _hash(key)
+		for slot in self._window(key_hash):
+			blob = self._read_slot(slot, key_hash)
+			if blob is None:
+				continue
+			stored_key, tags, value = self._decode(blob)
+			if stored_key != key:
+				continue
+			if not self._current(tags):
+				break
+			# Reference bit for CLOCK; a lost race only affects eviction order
+			struct.pack_into("<I", self._mmap, slot + 8, 1)
+			self._bump(_HITS_OFFSET)
+			return value
+		self._bump(_MISSES_OFFSET)
+		return None
+
+	def set(
+		self, key: str, value: bytes, tags: Iterable[str] = (), generation: Optional[int] = None
+	) -> bool:
+		"""
+		Store value under key unless an invalidation happened since generation
+		was read or the entry does not fit in a slot.
+		"""
+		key_bytes = key.encode("utf-8")
+		tag_cells = sorted({self._tag_cell(tag) for tag in tags})
+		size = 8 + len(key_bytes) + 16 * len(tag_cells) + len(value)
+		if size > self.slot_size:
+			return False
+		key_hash = _hash(key)
+		with self._locked():
+			if generation is not None and generation != self.generation:
+				return False
+			blob = bytearray(struct.pack("<II", len(key_bytes), len(tag_cells)))
+			blob += key_bytes
+			for cell in tag_cells:
+				blob += struct.pack("<QQ", cell, self._tag_version(cell))
+			blob += value
+			self._write_slot(self._choose_slot(key, key_hash), key_hash, bytes(blob))
+			return True
+
+	def _choose_slot(self, key: str, key_hash: int) -> int:
+		"""The slot for key: its current slot, a free or stale one, else the CLOCK victim"""
+		mapping = self._mmap
+		window = self._window(key_hash)
+		free = None
+		for slot in window:
+			_, used, _, length, slot_hash = _SLOT.unpack_from(mapping, slot)
+			if not used:
+				free = free if free is not None else slot
+				continue
+			start = slot + _SLOT_HEADER_SIZE
+			stored_key, tags, _ = self._decode(mapping[start:start + length])
+			if slot_hash == key_hash and stored_key == key:
+				return slot
+			if free is None and not self._current(tags):
+				free = slot
+		if free is not None:
+			return free
+
+		hand = _COUNTER.unpack_from(mapping, _CLOCK_OFFSET)[0]
+		for step in range(2 * len(window)):
+			slot = window[(hand + step) % len(window)]
+			if struct.unpack_from("<I", mapping, slot + 8)[0]:
+				struct.pack_into("<I", mapping, slot + 8, 0)
+				continue
+			_COUNTER.pack_into(mapping, _CLOCK_OFFSET, hand + step + 1)
+			self._bump(_EVICTIONS_OFFSET)
+			return slot
+		return window[hand % len(window)]
+
+	def _write_slot(self, slot: int, key_hash: int, blob: bytes):
+		mapping = self._mmap
+		seq = _SEQ.unpack_from(mapping, slot)[0]
+		_SEQ.pack_into(mapping, slot, (seq + 1) & 0xFFFFFFFF)
+		start = slot + _SLOT_HEADER_SIZE
+		mapping[start:start + len(blob)] = blob
+		_SLOT.pack_into(mapping, slot, (seq + 1) & 0xFFFFFFFF, 1, 1, len(blob), key_hash)
+		_SEQ.pack_into(mapping, slot, (seq + 2) & 0xFFFFFFFF)
+
+	def delete(self, key: str):
+		"""Drop key (no-op if absent)"""
+		key_hash = _hash(key)
+		with self._locked():
+			for slot in self._window(key_hash):
+				blob = self._read_slot(slot, key_hash)
+				if blob is not None and self._decode(blob)[0] == key:
+					seq = _SEQ.unpack_from(self._mmap, slot)[0]
+					_SLOT.pack_into(self._mmap, slot, (seq + 2) & 0xFFFFFFFF, 0, 0, 0, 0)
+
+	def invalidate(self, tags: Iterable[str]):
+		"""Make every entry carrying any of the given tags stale, in every process"""
+		with self._locked():
+			self._bump(_GENERATION_OFFSET)
+			for cell in {self._tag_cell(tag) for tag in tags}:
+				self._bump(cell)
+
+	def clear(self):
+		"""Drop every entry"""
+		with self._locked():
+			self._bump(_GENERATION_OFFSET)
+			for i in range(self.slot_count):
+				slot = self._slots_offset + i * self._stride
+				seq = _SEQ.unpack_from(self._mmap, slot)[0]
+				_SLOT.pack_into(self._mmap, slot, (seq + 2) & 0xFFFFFFFF, 0, 0, 0, 0)
+
+	def stats(self) -> Dict[str, int]:
+		"""Entry count, byte size and (approximate) hit/miss/eviction counters"""
+		entries = size = 0
+		for i in range(self.slot_count):
+			_, used, _, length, _ = _SLOT.unpack_from(self._mmap, self._slots_offset + i * self._stride)
+			if used:
+				entries += 1
+				size += length
+		_, _, _, _, _, hits, misses, evictions, _ = _HEADER.unpack_from(self._mmap, 0)
+		return {
+			"entries": entries,
+			"bytes": size,
+			"max_bytes": self.slot_count * self.slot_size,
+			"hits": hits,
+			"misses": misses,
+			"evictions": evictions,
+		}
+
+
+class SharedPageCache:
+	"""
+	PageCache-compatible page cache stored in a SharedCache, so all workers on
+	a host share one warm cache and one invalidation state.
+
+	Usage:
+		cache = SharedPageCache("instance/page_cache.bin", max_bytes=64 * 1024 * 1024)
+		generation = cache.generation
+		cache.set("/post/hello", CachedPage(body, 200, []), {"posts"}, generation)
+	"""
+
+	def __init__(self, path: str, max_bytes: int, slot_count: int = 512):
+		self.cache = SharedCache(path, slot_count, max(4096, max_bytes // slot_count))
+
+	@property
+	def generation(self) -> int:
+		return self.cache.generation
+
+	def get(self, key: str) -> Optional[CachedPage]:
+		value = self.cache.get(key)
+		if value is None:
+			return None
+		status, headers_length = struct.unpack_from("<II", value, 0)
+		headers = [tuple(header) for header in json.loads(value[8:8 + headers_length])]
+		return CachedPage(value[8 + headers_length:], status, headers)
+
+	def set(self, key: str, page: CachedPage, tags: Iterable[str], generation: int) -> bool:
+		headers = json.dumps(page.headers).encode("utf-8")
+		value = struct.pack("<II", page.status, len(headers)) + headers + page.body
+		return self.cache.set(key, value, tags, generation)
+
+	def invalidate(self, tags: Iterable[str]):
+		self.cache.invalidate(tags)
+
+	def clear(self):
+		self.cache.clear()
+
+	def stats(self) -> Dict[str, int]:
+		return self.cache.stats()
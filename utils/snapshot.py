@@ -0,0 +1,330 @@
+import os
+import mmap
+import time
+import struct
+import threading
+import contextlib
+from array import array
+from typing import Callable, Iterable, List, NamedTuple, Optional, Tuple
+
+try:
+	import fcntl
+except ImportError:
+	fcntl = None
+
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+from utils.catalog import CatalogRow
+
+
+MAGIC = b"CMSSNAP\0"
+SNAPSHOT_FORMAT = 1
+# magic, format, reserved, generation, rows, tag entries, string heap bytes
+_HEADER = struct.Struct("<8sIIQQQQ")
+
+
+class SnapshotRow(NamedTuple):
+	"""One published post as stored in a snapshot"""
+	id: int
+	stamp: int
+	category_id: Optional[int]
+	tag_ids: Tuple[int, ...]
+	slug: str
+	title: str
+	excerpt: str
+
+
+def _align(offset: int) -> int:
+	return (offset + 7) & ~7
+
+
+def _layout(count: int, tags: int, heap: int) -> List[Tuple[str, str, int]]:
+	"""(name, typecode, length) of the sections following the header, in order"""
+	return [
+		("ids", "q", count),
+		("stamps", "q", count),
+		("category_ids", "q", count),
+		("by_id", "q", count),
+		("tag_offsets", "q", count + 1),
+		("tag_ids", "q", tags),
+		("tag_rows", "q", tags),
+		("string_offsets", "q", 3 * count + 1),
+		("status_codes", "b", count),
+		("heap", "B", heap),
+	]
+
+
+def write_snapshot(path: str, rows: Iterable[SnapshotRow], generation: int):
+	"""
+	Write rows as a snapshot file, atomically (temporary file, then os.replace).
+
+	Rows are stored newest last, sorted by (stamp, id), like utils.catalog.
+	"""
+	rows = sorted(rows, key=lambda row: (row.stamp, row.id))
+	count = len(rows)
+	columns = {
+		"ids": array("q", [row.id for row in rows]),
+		"stamps": array("q", [row.stamp for row in rows]),
+		"category_ids": array(
+			"q", [-1 if row.category_id is None else row.category_id for row in rows]
+		),
+		"by_id": array("q", sorted(range(count), key=lambda i: rows[i].id)),
+		"tag_offsets": array("q", [0]),
+		"tag_ids": array("q"),
+		"tag_rows": array("q"),
+		"string_offsets": array("q", [0]),
+		"status_codes": array("b", bytes(count)),
+	}
+	heap = bytearray()
+	for i, row in enumerate(rows):
+		columns["tag_ids"].extend(row.tag_ids)
+		columns["tag_rows"].extend([i] * len(row.tag_ids))
+		columns["tag_offsets"].append(len(columns["tag_ids"]))
+		for text in (row.slug, row.title, row.excerpt):
+			heap += (text or "").encode("utf-8")
+			columns["string_offsets"].append(len(heap))
+
+	os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+	tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+	try:
+		with open(tmp_path, "wb") as f:
+			f.write(
+				_HEADER.pack(
+					MAGIC, SNAPSHOT_FORMAT, 0, generation, count, len(columns["tag_ids"]), len(heap)
+				)
+			)
+			offset = _HEADER.size
+			for name, _, _ in _layout(count, len(columns["tag_ids"]), len(heap)):
+				padding = _align(offset) - offset
+				f.write(b"\0" * padding)
+				data = heap if name == "heap" else columns[name].tobytes()
+				f.write(data)
+				offset += padding + len(data)
+			f.flush()
+			os.fsync(f.fileno())
+		os.replace(tmp_path, path)
+	except OSError:
+		if os.path.exists(tmp_path):
+			os.unlink(tmp_path)
+		raise
+
+
+class Snapshot:
+	"""
+	Read-only view of a snapshot file mapped with mmap.
+
+	Columns are memoryviews into the mapping, so every process reading the
+	same file shares one copy of it in the page cache. The attributes match
+	utils.catalog's in-memory columns, so a Snapshot can back a Catalog;
+	all rows are published posts.
+
+	Usage:
+		snapshot = Snapshot.open("instance/content.snapshot")
+		Catalog(columns=snapshot).query(tag_id=5, limit=10)
+	"""
+
+	statuses = ["published"]
+
+	def __init__(self, path: str, f, mapping):
+		self.path = path
+		self._file = f
+		self._mmap = mapping
+		_, _, _, self.generation, count, tags, heap = _HEADER.unpack_from(mapping, 0)
+		self._count = count
+		self.stat = os.fstat(f.fileno())
+		view = memoryview(mapping)
+		self.np = {} if np is not None else None
+		offset = _HEADER.size
+		for name, typecode, length in _layout(count, tags, heap):
+			offset = _align(offset)
+			size = length * struct.calcsize(typecode)
+			if offset + size > len(mapping):
+				raise ValueError(f"Truncated snapshot: {path}")
+			setattr(self, name, view[offset:offset + size].cast(typecode))
+			if self.np is not None and name != "heap":
+				self.np[name] = np.frombuffer(mapping, dtype=typecode, count=length, offset=offset)
+			offset += size
+
+	@classmethod
+	def open(cls, path: str) -> Optional["Snapshot"]:
+		"""Map a snapshot file; None if missing, unreadable or of another format"""
+		try:
+			f = open(path, "rb")
+		except OSError:
+			return None
+		try:
+			mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+			magic, fmt = _HEADER.unpack_from(mapping, 0)[:2]
+			if magic != MAGIC or fmt != SNAPSHOT_FORMAT:
+				f.close()
+				return None
+			return cls(path, f, mapping)
+		except (OSError, ValueError, struct.error):
+			f.close()
+			return None
+
+	def __len__(self) -> int:
+		return self._count
+
+	def _string(self, i: int) -> str:
+		start, end = self.string_offsets[i], self.string_offsets[i + 1]
+		return bytes(self.heap[start:end]).decode("utf-8")
+
+	def slug(self, i: int) -> str:
+		return self._string(3 * i)
+
+	def title(self, i: int) -> str:
+		return self._string(3 * i + 1)
+
+	def excerpt(self, i: int) -> str:
+		return self._string(3 * i + 2)
+
+	def position(self, post_id: int) -> Optional[int]:
+		"""Row of post_id (binary search over the by_id permutation), or None"""
+		by_id, ids = self.by_id, self.ids
+		lo, hi = 0, self._count
+		while lo < hi:
+			mid = (lo + hi) // 2
+			if ids[by_id[mid]] < post_id:
+				lo = mid + 1
+			else:
+				hi = mid
+		if lo < self._count and ids[by_id[lo]] == post_id:
+			return by_id[lo]
+		return None
+
+	def _tags(self, i: int) -> Tuple[int, ...]:
+		return tuple(self.tag_ids[self.tag_offsets[i]:self.tag_offsets[i + 1]])
+
+	def row(self, i: int) -> CatalogRow:
+		category_id = self.category_ids[i]
+		return CatalogRow(
+			self.ids[i],
+			self.stamps[i],
+			"published",
+			None if category_id < 0 else category_id,
+			self._tags(i),
+			self.title(i),
+			self.slug(i),
+		)
+
+	def record(self, i: int) -> SnapshotRow:
+		category_id = self.category_ids[i]
+		return SnapshotRow(
+			self.ids[i],
+			self.stamps[i],
+			None if category_id < 0 else category_id,
+			self._tags(i),
+			self.slug(i),
+			self.title(i),
+			self.excerpt(i),
+		)
+
+	def memory_usage(self) -> int:
+		"""Bytes held privately by this process (the mapping itself is shared)"""
+		return 0
+
+
+@contextlib.contextmanager
+def _write_lock(path: str):
+	"""Serialize snapshot writers across processes (no-op without fcntl)"""
+	os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+	with open(f"{path}.lock", "a") as lock_file:
+		if fcntl is not None:
+			fcntl.flock(lock_file, fcntl.LOCK_EX)
+		try:
+			yield
+		finally:
+			if fcntl is not None:
+				fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class SnapshotFile:
+	"""
+	A snapshot file shared by every worker.
+
+	Readers call current(), which re-stats the file at most once per
+	check_interval seconds and maps the new file when a writer replaced it
+	with a higher generation; requests already holding the previous mapping
+	keep using it until they drop it. Writers hold an exclusive lock while
+	they read the changed rows from their source and write the next
+	generation, so each generation contains every earlier write and a writer
+	never puts rows read before another's write into a later generation.
+
+	Usage:
+		snapshots = SnapshotFile("instance/content.snapshot")
+		snapshots.update(lambda: load_rows(ids), removed_ids=ids, load_all=load_rows)
+		snapshot = snapshots.current()
+	"""
+
+	def __init__(self, path: str, check_interval: float = 0.0):
+		self.path = path
+		self.check_interval = check_interval
+		self._snapshot: Optional[Snapshot] = None
+		self._next_check = 0.0
+		self._lock = threading.Lock()
+
+	def current(self) -> Optional[Snapshot]:
+		"""The newest snapshot, or None if there is none yet"""
+		now = time.monotonic()
+		snapshot = self._snapshot
+		if snapshot is not None and now < self._next_check:
+			return snapshot
+		with self._lock:
+			self._next_check = now + self.check_interval
+			snapshot = self._snapshot
+			try:
+				stat = os.stat(self.path)
+			except OSError:
+				return snapshot
+			if snapshot is not None and (stat.st_ino, stat.st_mtime_ns) == (
+				snapshot.stat.st_ino,
+				snapshot.stat.st_mtime_ns,
+			):
+				return snapshot
+			fresh = Snapshot.open(self.path)
+			if fresh is not None and (snapshot is None or fresh.generation > snapshot.generation):
+				self._snapshot = snapshot = fresh
+			return snapshot
+
+	def update(
+		self,
+		load_rows: Callable[[], Iterable[SnapshotRow]],
+		removed_ids: Iterable[int],
+		load_all: Callable[[], List[SnapshotRow]],
+	) -> int:
+		"""
+		Replace the rows of changed posts and write the next generation.
+
+		load_rows() provides the current rows of the changed posts and
+		load_all() every row when there is no readable snapshot yet; both are
+		called with the lock held. Returns the generation written.
+		"""
+		removed_ids = set(removed_ids)
+		with _write_lock(self.path):
+			latest = Snapshot.open(self.path)
+			if latest is None:
+				records, generation = load_all(), 1
+			else:
+				rows = list(load_rows())
+				replaced = removed_ids | {row.id for row in rows}
+				records = [
+					latest.record(i) for i in range(len(latest)) if latest.ids[i] not in replaced
+				]
+				records.extend(rows)
+				generation = latest.generation + 1
+			write_snapshot(self.path, records, generation)
+		self._next_check = 0.0
+		return generation
+
+	def rebuild(self, load_all: Callable[[], Iterable[SnapshotRow]]) -> int:
+		"""Write all rows, read by load_all() with the lock held, as the next generation"""
+		with _write_lock(self.path):
+			latest = Snapshot.open(self.path)
+			generation = latest.generation + 1 if latest is not None else 1
+			write_snapshot(self.path, load_all(), generation)
+		self._next_check = 0.0
+		return generation
@@ -0,0 +1,124 @@
+import heapq
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+from utils.search_index import tokenize
+
+
+class Suggestion(NamedTuple):
+	"""A completion candidate"""
+	label: str
+	url: str
+	kind: str
+	weight: float
+
+
+def normalize(text: str) -> str:
+	"""Lower-case, accent-free words of text joined by single spaces"""
+	text = unicodedata.normalize("NFKD", text or "")
+	text = "".join(char for char in text if not unicodedata.combining(char))
+	return " ".join(tokenize(text))
+
+
+def _terms(label: str) -> List[str]:
+	"""The label from each word on ("about flask" -> "about flask", "flask")"""
+	words = normalize(label).split(" ")
+	return [" ".join(words[i:]) for i in range(len(words)) if words[i]]
+
+
+class SuggestIndex:
+	"""
+	Prefix index for typeahead over short labels (titles, tag and category names).
+
+	Every label is stored under each of its word-aligned suffixes in one sorted
+	list of (term, key) pairs, so a prefix lookup is a binary search followed
+	by a bounded scan. Candidates are ranked by weight, then by matching at the
+	start of the label, then by length. Adding, removing and re-weighting
+	single entries is incremental.
+
+	Usage:
+		index = SuggestIndex.build([("tag:1", "python", "/tag/python", "tag", 12)])
+		index.suggest("py")  # [Suggestion("python", "/tag/python", "tag", 12)]
+	"""
+
+	MAX_SCAN = 1000
+
+	def __init__(self):
+		self._terms: List[Tuple[str, str]] = []
+		self._entries: Dict[str, Suggestion] = {}
+		# Length of each entry's normalized label, its longest term
+		self._label_lengths: Dict[str, int] = {}
+		self._lock = threading.Lock()
+
+	@classmethod
+	def build(cls, entries: Iterable[Tuple[str, str, str, str, float]]) -> "SuggestIndex":
+		"""Build from (key, label, url, kind, weight) tuples with a single sort"""
+		index = cls()
+		for key, label, url, kind, weight in entries:
+			terms = _terms(label)
+			index._entries[key] = Suggestion(label, url, kind, weight)
+			index._label_lengths[key] = len(terms[0]) if terms else 0
+			index._terms.extend((term, key) for term in terms)
+		index._terms.sort()
+		return index
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+	def add(self, key: str, label: str, url: str, kind: str, weight: float = 1.0):
+		"""Add or replace an entry"""
+		with self._lock:
+			existing = self._entries.get(key)
+			if existing is not None and existing.label == label:
+				self._entries[key] = Suggestion(label, url, kind, weight)
+				return
+			self._remove(key)
+			terms = _terms(label)
+			self._entries[key] = Suggestion(label, url, kind, weight)
+			self._label_lengths[key] = len(terms[0]) if terms else 0
+			for term in terms:
+				insort(self._terms, (term, key))
+
+	def remove(self, key: str):
+		"""Remove an entry (no-op if absent)"""
+		with self._lock:
+			self._remove(key)
+
+	def _remove(self, key: str):
+		entry = self._entries.pop(key, None)
+		if entry is None:
+			return
+		self._label_lengths.pop(key, None)
+		for term in _terms(entry.label):
+			i = bisect_left(self._terms, (term, key))
+			if i < len(self._terms) and self._terms[i] == (term, key):
+				del self._terms[i]
+
+	def keys(self, kind: str) -> List[str]:
+		"""Keys of the entries of one kind"""
+		with self._lock:
+			return [key for key, entry in self._entries.items() if entry.kind == kind]
+
+	def suggest(self, query: str, limit: int = 8) -> List[Suggestion]:
+		"""Best entries having a word-aligned part starting with query"""
+		prefix = normalize(query)
+		if not prefix:
+			return []
+		with self._lock:
+			terms, entries, label_lengths = self._terms, self._entries, self._label_lengths
+			ranked: Dict[str, Tuple[float, bool, int]] = {}
+			i = bisect_left(terms, (prefix, ""))
+			end = min(len(terms), i + self.MAX_SCAN)
+			while i < end:
+				term, key = terms[i]
+				if not term.startswith(prefix):
+					break
+				entry = entries[key]
+				# The longest term of an entry is its whole label
+				at_start = len(term) == label_lengths[key] or key in ranked and ranked[key][1]
+				ranked[key] = (entry.weight, at_start, -len(entry.label))
+				i += 1
+			best = heapq.nlargest(limit, ranked.items(), key=lambda item: item[1])
+			return [entries[key] for key, _ in best]
@@ -0,0 +1,157 @@
+import heapq
+import threading
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+def _intersect(postings: List[array]) -> array:
+	"""Ids present in every sorted postings array"""
+	postings = sorted(postings, key=len)
+	result = postings[0]
+	for docs in postings[1:]:
+		if not result:
+			break
+		if len(result) * 16 < len(docs):
+			# Few candidates left: probe the longer array instead of scanning it
+			matched = array("I")
+			for doc in result:
+				i = bisect_left(docs, doc)
+				if i < len(docs) and docs[i] == doc:
+					matched.append(doc)
+			result = matched
+		else:
+			result = array("I", sorted(set(result).intersection(docs)))
+	return array("I", result)
+
+
+def _union(postings: List[array]) -> array:
+	"""Ids present in any sorted postings array, sorted and deduplicated"""
+	result = array("I")
+	last = None
+	for doc in heapq.merge(*postings):
+		if doc != last:
+			result.append(doc)
+			last = doc
+	return result
+
+
+class TagIndex:
+	"""
+	In-memory tag membership index for published posts.
+
+	Each tag maps to a sorted array('I') of post ids, so combining tags is a
+	merge of compact integer arrays: AND intersects starting from the rarest
+	tag (probing with bisect once few candidates remain), OR merges. Facet
+	counts walk the matching posts' own tag lists, so they cost the size of
+	the result rather than the number of tags. Posts are ordered by a sort
+	stamp (publish time). Adding, re-tagging and removing single posts is
+	incremental.
+
+	Usage:
+		index = TagIndex.build([(1, ("python", "flask"), 1700000000.0)])
+		ids = index.match(["python", "flask"], mode="all")
+		index.newest(ids, limit=10)  # [1]
+		index.facets(ids, exclude=["python", "flask"])  # []
+	"""
+
+	def __init__(self):
+		self._postings: Dict[str, array] = {}
+		self._post_tags: Dict[int, Tuple[str, ...]] = {}
+		self._stamps: Dict[int, float] = {}
+		self._lock = threading.Lock()
+
+	@classmethod
+	def build(cls, posts: Iterable[Tuple[int, Sequence[str], float]]) -> "TagIndex":
+		"""Build from (post id, tag names, sort stamp) tuples"""
+		index = cls()
+		members: Dict[str, List[int]] = {}
+		for post_id, tags, stamp in posts:
+			tags = tuple(dict.fromkeys(tags))
+			index._post_tags[post_id] = tags
+			index._stamps[post_id] = stamp
+			for tag in tags:
+				members.setdefault(tag, []).append(post_id)
+		index._postings = {tag: array("I", sorted(ids)) for tag, ids in members.items()}
+		return index
+
+	def __len__(self) -> int:
+		return len(self._post_tags)
+
+	def __contains__(self, tag: str) -> bool:
+		return tag in self._postings
+
+	def count(self, tag: str) -> int:
+		"""Number of posts carrying tag"""
+		docs = self._postings.get(tag)
+		return len(docs) if docs is not None else 0
+
+	def set_post(self, post_id: int, tags: Sequence[str], stamp: float = 0.0):
+		"""Add a post or replace its tags and stamp"""
+		tags = tuple(dict.fromkeys(tags))
+		with self._lock:
+			old = self._post_tags.get(post_id, ())
+			for tag in set(old) - set(tags):
+				self._discard(tag, post_id)
+			for tag in set(tags) - set(old):
+				docs = self._postings.setdefault(tag, array("I"))
+				docs.insert(bisect_left(docs, post_id), post_id)
+			self._post_tags[post_id] = tags
+			self._stamps[post_id] = stamp
+
+	def remove_post(self, post_id: int):
+		"""Drop a post from the index (no-op if absent)"""
+		with self._lock:
+			for tag in self._post_tags.pop(post_id, ()):
+				self._discard(tag, post_id)
+			self._stamps.pop(post_id, None)
+
+	def _discard(self, tag: str, post_id: int):
+		docs = self._postings.get(tag)
+		if docs is None:
+			return
+		i = bisect_left(docs, post_id)
+		if i < len(docs) and docs[i] == post_id:
+			del docs[i]
+		if not docs:
+			del self._postings[tag]
+
+	def match(self, tags: Sequence[str], mode: str = "all") -> array:
+		"""
+		Sorted ids of the posts carrying every tag ("all") or any tag ("any").
+		"""
+		if mode not in ("all", "any"):
+			raise ValueError(f"Unknown tag match mode: {mode}")
+		with self._lock:
+			postings = [self._postings.get(tag, array("I")) for tag in dict.fromkeys(tags)]
+			if not postings:
+				return array("I")
+			if mode == "all":
+				return _intersect(postings)
+			return _union([docs for docs in postings if docs])
+
+	def newest(self, post_ids: Iterable[int], offset: int = 0, limit: int = 10) -> List[int]:
+		"""One page of post_ids ordered by stamp, newest first"""
+		stamps = self._stamps
+		best = heapq.nlargest(
+			offset + limit, post_ids, key=lambda post_id: (stamps.get(post_id, 0.0), post_id)
+		)
+		return best[offset:]
+
+	def facets(
+		self,
+		post_ids: Iterable[int],
+		exclude: Sequence[str] = (),
+		limit: Optional[int] = None,
+	) -> List[Tuple[str, int]]:
+		"""(tag, count) of the other tags carried by post_ids, most common first"""
+		counts: Counter = Counter()
+		with self._lock:
+			post_tags = self._post_tags
+			for post_id in post_ids:
+				counts.update(post_tags.get(post_id, ()))
+		for tag in exclude:
+			counts.pop(tag, None)
+		ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+		return ranked[:limit] if limit is not None else ranked
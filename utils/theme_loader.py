@@ -1,4 +1,6 @@
 import os
+import hashlib
+import datetime
 import importlib.util
 import sys
 import shutil
@@ -68,6 +70,30 @@ def copy_theme_static_files(theme_name: str, main_static_dir: str = 'static') ->
 		print(f"Error copying static files for theme '{theme_name}': {str(e)}")
 		return False
 
+def _theme_files(theme_name: str):
+	"""(path, stat) of every file in a theme, in a stable order"""
+	theme_dir = os.path.join('themes', theme_name)
+	for root, dirs, files in os.walk(theme_dir):
+		dirs.sort()
+		for filename in sorted(files):
+			path = os.path.join(root, filename)
+			try:
+				yield path, os.stat(path)
+			except OSError:
+				continue
+
+def get_theme_version(theme_name: str) -> str:
+	"""Fingerprint of a theme's files (paths, sizes, mtimes), changing whenever the theme is edited"""
+	digest = hashlib.sha1(theme_name.encode())
+	for path, stat in _theme_files(theme_name):
+		digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+	return digest.hexdigest()[:16]
+
+def get_theme_modified(theme_name: str) -> datetime.datetime:
+	"""Latest modification time of a theme's files, as a naive UTC datetime"""
+	latest = max((stat.st_mtime for _, stat in _theme_files(theme_name)), default=0)
+	return datetime.datetime.utcfromtimestamp(latest)
+
 def load_theme(theme_name: str, main_static_dir: str = 'static') -> Tuple[Dict[str, Callable], bool]:
 	"""Load both functions and static files for a theme"""
 	functions = load_theme_functions(theme_name)